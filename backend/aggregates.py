@@ -0,0 +1,128 @@
+"""
+Incrementally maintained statistics for GetLos_T (stats_aggregate table)
+Every function here only modifies the session - callers commit
+"""
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models import HistoricalDraw, Pick, StatsAggregate
+
+MIN_SUM = 21   # 1+2+3+4+5+6
+MAX_SUM = 279  # 44+45+46+47+48+49
+SUM_BINS = MAX_SUM - MIN_SUM + 1
+
+
+def _empty_aggregate(agg: StatsAggregate):
+    agg.freq = [0] * 49
+    agg.sum_hist = [0] * SUM_BINS
+    agg.sum_total = 0
+    agg.sum_sq_total = 0
+    agg.total_draws = 0
+
+
+def get_aggregate(db: Session) -> StatsAggregate:
+    """Return the aggregate row, building it from scratch if missing"""
+    agg = db.query(StatsAggregate).first()
+    if agg is None:
+        agg = rebuild_aggregate(db)
+    return agg
+
+
+def _lock_aggregate(db: Session) -> Optional[StatsAggregate]:
+    """
+    Bump data version with one atomic UPDATE and re-read the row (None if
+    missing). The UPDATE holds the write lock until commit, so concurrent
+    ingests apply their deltas one after another and never share a version
+    """
+    updated = db.query(StatsAggregate).update(
+        {StatsAggregate.data_version: StatsAggregate.data_version + 1},
+        synchronize_session=False
+    )
+    if not updated:
+        return None
+    return db.query(StatsAggregate).populate_existing().with_for_update().first()
+
+
+def rebuild_aggregate(db: Session) -> StatsAggregate:
+    """Recompute all aggregates from the tables and bump data version"""
+    db.flush()  # pending inserts/deletes must be visible (autoflush is off)
+    agg = _lock_aggregate(db)
+    if agg is None:
+        agg = StatsAggregate(data_version=1, total_picks=0)
+        db.add(agg)
+    
+    rows = [d.numbers for d in db.query(HistoricalDraw.numbers).all()]
+    _empty_aggregate(agg)
+    if rows:
+        arr = np.asarray(rows, dtype=np.int64)
+        sums = arr.sum(axis=1)
+        agg.freq = np.bincount(arr.ravel() - 1, minlength=49).tolist()
+        agg.sum_hist = np.bincount(sums - MIN_SUM, minlength=SUM_BINS).tolist()
+        agg.sum_total = int(sums.sum())
+        agg.sum_sq_total = int((sums ** 2).sum())
+        agg.total_draws = len(rows)
+    
+    agg.total_picks = db.query(Pick).count()
+    return agg
+
+
+def _apply_draws(db: Session, rows: List[List[int]], sign: int):
+    agg = _lock_aggregate(db)
+    if agg is None:
+        # Rebuild already sees the pending change
+        rebuild_aggregate(db)
+        return
+    
+    freq = list(agg.freq)
+    sum_hist = list(agg.sum_hist)
+    sum_total = agg.sum_total
+    sum_sq_total = agg.sum_sq_total
+    
+    for numbers in rows:
+        s = sum(numbers)
+        for n in numbers:
+            freq[n - 1] += sign
+        sum_hist[s - MIN_SUM] += sign
+        sum_total += sign * s
+        sum_sq_total += sign * s * s
+    
+    # New list objects so SQLAlchemy detects JSON changes
+    agg.freq = freq
+    agg.sum_hist = sum_hist
+    agg.sum_total = sum_total
+    agg.sum_sq_total = sum_sq_total
+    agg.total_draws = agg.total_draws + sign * len(rows)
+
+
+def record_draws_added(db: Session, rows: List[List[int]]):
+    """Add newly inserted draws to aggregates"""
+    if rows:
+        _apply_draws(db, rows, +1)
+
+
+def record_draws_removed(db: Session, rows: List[List[int]]):
+    """Subtract deleted draws from aggregates"""
+    if rows:
+        _apply_draws(db, rows, -1)
+
+
+def record_picks_delta(db: Session, delta: int):
+    """Adjust pick count (atomic UPDATE, no read-modify-write)"""
+    if not delta:
+        return
+    if db.query(StatsAggregate.id).first() is None:
+        # Rebuild already sees the pending change
+        rebuild_aggregate(db)
+        return
+    db.query(StatsAggregate).update(
+        {StatsAggregate.total_picks: StatsAggregate.total_picks + delta},
+        synchronize_session=False
+    )
+
+
+def get_data_version(db: Session) -> int:
+    """Current data version of historical draws (single-row read)"""
+    version = db.query(StatsAggregate.data_version).scalar()
+    return version or 0
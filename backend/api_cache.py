@@ -0,0 +1,112 @@
+"""
+Persistent response cache for Lotto.pl API calls (GetLos_T)
+SQLite file under data/, keyed by (endpoint, params). Published draws never
+change, so results for a date are kept forever; "latest" queries and
+empty (negative) answers expire after their own TTLs
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+CACHE_ENABLED = os.getenv("LOTTO_API_CACHE", "1") != "0"
+CACHE_PATH = Path(os.getenv("LOTTO_API_CACHE_PATH", Path(__file__).parent / "data" / "api_cache.db"))
+
+LATEST_TTL = 60.0  # last results / listing pages (seconds)
+NEGATIVE_TTL = 24 * 3600.0  # no draw for a past date
+RECENT_NEGATIVE_TTL = 600.0  # no draw for today / yesterday (may not be published yet)
+
+_lock = threading.Lock()
+_conn: Optional[sqlite3.Connection] = None
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def _connect() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _conn = sqlite3.connect(str(CACHE_PATH), check_same_thread=False)
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, endpoint TEXT NOT NULL, body TEXT NOT NULL,"
+            " negative INTEGER NOT NULL, fetched_at REAL NOT NULL, expires_at REAL)"
+        )
+        _conn.commit()
+    return _conn
+
+
+def _key(endpoint: str, params: Dict[str, Any]) -> str:
+    return endpoint + "?" + json.dumps(params, sort_keys=True, default=str)
+
+
+def _count(endpoint: str, field: str):
+    counts = _stats.setdefault(endpoint, {"hits": 0, "misses": 0})
+    counts[field] += 1
+
+
+def get(endpoint: str, params: Dict[str, Any]) -> Optional[Any]:
+    """Cached body or None (missing / expired / cache disabled)"""
+    if not CACHE_ENABLED:
+        return None
+    with _lock:
+        row = _connect().execute(
+            "SELECT body, expires_at FROM responses WHERE key = ?", (_key(endpoint, params),)
+        ).fetchone()
+        hit = row is not None and (row[1] is None or row[1] > time.time())
+        _count(endpoint, "hits" if hit else "misses")
+    return json.loads(row[0]) if hit else None
+
+
+def put(endpoint: str, params: Dict[str, Any], body: Any, ttl: Optional[float]):
+    """Store a response body; ttl None = never expires"""
+    if not CACHE_ENABLED:
+        return
+    now = time.time()
+    with _lock:
+        conn = _connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, endpoint, body, negative, fetched_at, expires_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (_key(endpoint, params), endpoint, json.dumps(body), int(not body), now,
+             None if ttl is None else now + ttl)
+        )
+        conn.commit()
+
+
+def draw_date_ttl(draw_date: date, body: Any) -> Optional[float]:
+    """TTL of a per-day answer: published draws forever, negatives by recency"""
+    if body:
+        return None
+    if draw_date >= date.today() - timedelta(days=1):
+        return RECENT_NEGATIVE_TTL
+    return NEGATIVE_TTL
+
+
+def stats() -> dict:
+    """Hit/miss counters since start and stored entries"""
+    if not CACHE_ENABLED:
+        return {"enabled": False, "entries": 0, "negative_entries": 0, "expired_entries": 0,
+                "hits": 0, "misses": 0, "hit_rate": None, "endpoints": {}}
+    with _lock:
+        entries, negative, expired = _connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(negative), 0),"
+            " COALESCE(SUM(expires_at IS NOT NULL AND expires_at <= ?), 0) FROM responses",
+            (time.time(),)
+        ).fetchone()
+        endpoints = {name: dict(counts) for name, counts in _stats.items()}
+    hits = sum(c["hits"] for c in endpoints.values())
+    misses = sum(c["misses"] for c in endpoints.values())
+    return {
+        "enabled": True,
+        "entries": entries,
+        "negative_entries": negative,
+        "expired_entries": expired,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+        "endpoints": endpoints,
+    }
@@ -0,0 +1,62 @@
+"""
+Gap filling from the Lotto.pl API (GetLos_T)
+Draws fetched by lotto_api (one request per draw date) are de-duplicated
+against the database and inserted in one batch - shared by sync and
+integrity fixes
+"""
+from typing import Dict, List
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+import integrity
+from lotto_api import parse_lotto_draw
+from models import HistoricalDraw, norm_key
+
+
+def insert_draws(db: Session, api_draws: List[Dict]) -> List[HistoricalDraw]:
+    """
+    Ingest fetched draws (raw API results in date order) in one batch:
+    draws not yet in the database (by key or draw_system_id) are added,
+    existing draws without draw_system_id get it attached.
+    Caller runs on_draws_added and commits
+    """
+    parsed = [p for p in map(parse_lotto_draw, api_draws) if p and p["numbers"]]
+    if not parsed:
+        return []
+
+    keys = {norm_key(p["numbers"]) for p in parsed}
+    api_ids = {p["draw_system_id"] for p in parsed if p["draw_system_id"]}
+    existing = {d.key: d for d in db.query(HistoricalDraw).filter(HistoricalDraw.key.in_(keys))}
+    existing_api_ids = {i for (i,) in db.query(HistoricalDraw.draw_system_id).filter(
+        HistoricalDraw.draw_system_id.in_(api_ids)
+    )} if api_ids else set()
+
+    max_seq = db.query(func.max(HistoricalDraw.sequential_id)).scalar() or 0
+    new_draws = []
+    for p in parsed:
+        key = norm_key(p["numbers"])
+        api_id = p["draw_system_id"]
+        if key in existing:
+            draw = existing[key]
+            if not draw.draw_system_id and api_id and api_id not in existing_api_ids:
+                draw.draw_system_id = api_id
+                existing_api_ids.add(api_id)
+                integrity.mark_dirty(db)
+            continue
+        if api_id and api_id in existing_api_ids:
+            continue
+        max_seq += 1
+        draw = HistoricalDraw(
+            numbers=p["numbers"],
+            key=key,
+            source=p["draw_date"],
+            draw_system_id=api_id,
+            sequential_id=max_seq
+        )
+        existing[key] = draw
+        if api_id:
+            existing_api_ids.add(api_id)
+        new_draws.append(draw)
+    db.add_all(new_draws)
+    return new_draws
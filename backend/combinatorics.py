@@ -0,0 +1,148 @@
+"""
+Combinatorial helpers for GetLos_T
+Ranking of k-subsets of the 1-49 number universe (colex order)
+"""
+from itertools import combinations
+from math import comb
+from typing import List, Sequence
+
+import numpy as np
+
+UNIVERSE_SIZE = 49
+PAIRS_TOTAL = comb(UNIVERSE_SIZE, 2)    # 1176
+TRIPLES_TOTAL = comb(UNIVERSE_SIZE, 3)  # 18424
+
+
+def subset_rank(numbers: Sequence[int]) -> int:
+    """
+    Colex rank of a subset of numbers 1-49
+    Example: [1, 2] -> 0, [1, 3] -> 1, [2, 3] -> 2, [1, 4] -> 3
+    """
+    return sum(comb(n - 1, i + 1) for i, n in enumerate(sorted(numbers)))
+
+
+def subset_unrank(rank: int, k: int) -> List[int]:
+    """
+    Inverse of subset_rank - returns sorted k numbers (1-49) for a colex rank
+    """
+    out = []
+    for i in range(k, 0, -1):
+        c = i - 1
+        while comb(c + 1, i) <= rank:
+            c += 1
+        rank -= comb(c, i)
+        out.append(c + 1)
+    return sorted(out)
+
+
+def _build_pair_rank_table() -> np.ndarray:
+    """(49, 49) table: [a, b] -> colex rank of pair {a+1, b+1}, -1 on diagonal"""
+    a, b = np.meshgrid(np.arange(UNIVERSE_SIZE), np.arange(UNIVERSE_SIZE), indexing="ij")
+    lo, hi = np.minimum(a, b), np.maximum(a, b)
+    table = lo + hi * (hi - 1) // 2
+    table[a == b] = -1
+    return table.astype(np.int32)
+
+
+def _build_triple_rank_table() -> np.ndarray:
+    """(49, 49, 49) table: [a, b, c] -> colex rank of triple, -1 if not distinct"""
+    grid = np.stack(np.meshgrid(
+        np.arange(UNIVERSE_SIZE), np.arange(UNIVERSE_SIZE), np.arange(UNIVERSE_SIZE),
+        indexing="ij"
+    ), axis=-1)
+    s = np.sort(grid, axis=-1)
+    table = s[..., 0] + s[..., 1] * (s[..., 1] - 1) // 2 + s[..., 2] * (s[..., 2] - 1) * (s[..., 2] - 2) // 6
+    distinct = (s[..., 0] != s[..., 1]) & (s[..., 1] != s[..., 2])
+    table[~distinct] = -1
+    return table.astype(np.int32)
+
+
+# Lookup tables indexed by 0-based numbers (number - 1)
+PAIR_RANK = _build_pair_rank_table()
+TRIPLE_RANK = _build_triple_rank_table()
+
+# Inverse tables: numbers (1-49) of every pair / triple by colex rank
+PAIR_NUMBERS = np.array([subset_unrank(r, 2) for r in range(PAIRS_TOTAL)], dtype=np.int32)
+TRIPLE_NUMBERS = np.array([subset_unrank(r, 3) for r in range(TRIPLES_TOTAL)], dtype=np.int32)
+
+# Positions of the 15 pairs / 20 triples inside a 6-number draw
+_DRAW_PAIRS = np.array(list(combinations(range(6), 2))).T
+_DRAW_TRIPLES = np.array(list(combinations(range(6), 3))).T
+
+
+# ========== Pair / triple counts ==========
+
+def pair_count_matrix(matrix: np.ndarray) -> np.ndarray:
+    """
+    (N, 6) draws -> symmetric (49, 49) pair co-occurrence counts
+    [a - 1, b - 1] = number of draws containing both a and b
+    """
+    counts = np.zeros((UNIVERSE_SIZE, UNIVERSE_SIZE), dtype=np.int32)
+    if len(matrix):
+        idx = np.asarray(matrix) - 1
+        a, b = _DRAW_PAIRS
+        by_rank = np.bincount(PAIR_RANK[idx[:, a], idx[:, b]].ravel(), minlength=PAIRS_TOTAL)
+        counts[PAIR_NUMBERS[:, 0] - 1, PAIR_NUMBERS[:, 1] - 1] = by_rank
+        counts += counts.T
+    return counts
+
+
+def triple_count_array(matrix: np.ndarray) -> np.ndarray:
+    """(N, 6) draws -> (18424,) triple counts indexed by colex rank"""
+    if not len(matrix):
+        return np.zeros(TRIPLES_TOTAL, dtype=np.int32)
+    idx = np.asarray(matrix) - 1
+    a, b, c = _DRAW_TRIPLES
+    ranks = TRIPLE_RANK[idx[:, a], idx[:, b], idx[:, c]].ravel()
+    return np.bincount(ranks, minlength=TRIPLES_TOTAL).astype(np.int32)
+
+
+def pair_counts_by_rank(pair_matrix: np.ndarray) -> np.ndarray:
+    """(49, 49) pair matrix -> (1176,) counts indexed by colex rank"""
+    return pair_matrix[PAIR_NUMBERS[:, 0] - 1, PAIR_NUMBERS[:, 1] - 1]
+
+
+def top_k_ranks(counts: np.ndarray, k: int) -> np.ndarray:
+    """
+    Ranks of the k largest non-zero counts, most frequent first (ties by rank)
+    argpartition + sort of k entries only
+    """
+    k = min(max(k, 0), int(np.count_nonzero(counts)))
+    if k == 0:
+        return np.zeros(0, dtype=np.int64)
+    idx = np.argpartition(-counts, k - 1)[:k]
+    return idx[np.lexsort((idx, -counts[idx]))]
+
+
+# ========== Bitmasks ==========
+# A 6-number ticket is stored as uint64 with bit (n - 1) set for every number n
+
+_M1 = np.uint64(0x5555555555555555)
+_M2 = np.uint64(0x3333333333333333)
+_M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+_H01 = np.uint64(0x0101010101010101)
+
+
+def numbers_to_mask(numbers: Sequence[int]) -> int:
+    """Bitmask of numbers 1-49"""
+    mask = 0
+    for n in numbers:
+        mask |= 1 << (n - 1)
+    return mask
+
+
+def rows_to_masks(rows: Sequence[Sequence[int]]) -> np.ndarray:
+    """Bitmasks (uint64 array) for a list of draws/tickets"""
+    if not len(rows):
+        return np.zeros(0, dtype=np.uint64)
+    arr = np.asarray(rows, dtype=np.uint64) - np.uint64(1)
+    return np.bitwise_or.reduce(np.left_shift(np.uint64(1), arr), axis=1)
+
+
+def popcount64(x: np.ndarray) -> np.ndarray:
+    """Vectorized popcount of a uint64 array (SWAR bit counting)"""
+    x = np.asarray(x, dtype=np.uint64)
+    x = x - ((x >> np.uint64(1)) & _M1)
+    x = (x & _M2) + ((x >> np.uint64(2)) & _M2)
+    x = (x + (x >> np.uint64(4))) & _M4
+    return ((x * _H01) >> np.uint64(56)).astype(np.uint8)
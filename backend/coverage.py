@@ -0,0 +1,127 @@
+"""
+Coverage-optimized ticket set designer (greedy covering / wheeling)
+Builds a set of tickets that covers as many distinct pairs and triples
+of the candidate pool as possible
+"""
+from itertools import combinations
+from math import comb
+from typing import List, Optional, Set
+
+import numpy as np
+
+from combinatorics import PAIR_RANK, TRIPLE_RANK, PAIRS_TOTAL, TRIPLES_TOTAL
+from models import norm_key
+
+# Gain weights for newly covered subsets
+PAIR_WEIGHT = 1.0
+TRIPLE_WEIGHT = 1.0
+
+# Attempts to re-draw a ticket whose key is already taken (history/picks)
+MAX_TICKET_RETRIES = 20
+
+# Positions of the 15 pairs / 20 triples inside a 6-number ticket
+_TICKET_PAIRS = np.array(list(combinations(range(6), 2))).T
+_TICKET_TRIPLES = np.array(list(combinations(range(6), 3))).T
+
+
+class CoverageDesigner:
+    """
+    Incremental greedy designer
+    Keeps bitsets (boolean arrays indexed by colex rank) of already covered
+    pairs and triples; every ticket is built number by number choosing the
+    candidate that covers the most new pairs/triples with the numbers
+    already in the ticket
+    """
+
+    def __init__(self, pool: List[int], seed: Optional[int] = None):
+        self.pool = np.array(sorted(set(pool)), dtype=np.int32) - 1  # 0-based
+        self.rng = np.random.default_rng(seed)
+        self.covered_pairs = np.zeros(PAIRS_TOTAL, dtype=bool)
+        self.covered_triples = np.zeros(TRIPLES_TOTAL, dtype=bool)
+        # Pool-restricted lookup tables
+        self._pair_rank = PAIR_RANK[np.ix_(self.pool, self.pool)]
+        self._triple_rank = TRIPLE_RANK[np.ix_(self.pool, self.pool, self.pool)]
+
+    def _next_ticket(self) -> List[int]:
+        size = len(self.pool)
+        chosen: List[int] = []  # positions in pool
+        available = np.ones(size, dtype=bool)
+
+        for step in range(6):
+            if step == 0:
+                # Start from the number with the most uncovered pairs
+                ranks = self._pair_rank
+                uncovered = ~self.covered_pairs[ranks] & (ranks >= 0)
+                gain = uncovered.sum(axis=1) * PAIR_WEIGHT
+            else:
+                ranks = self._pair_rank[chosen]
+                gain = (~self.covered_pairs[ranks] & (ranks >= 0)).sum(axis=0) * PAIR_WEIGHT
+                if step >= 2:
+                    chosen_arr = np.array(chosen)
+                    a_idx, b_idx = np.triu_indices(len(chosen), k=1)
+                    t_ranks = self._triple_rank[chosen_arr[a_idx], chosen_arr[b_idx]]
+                    gain = gain + (~self.covered_triples[t_ranks] & (t_ranks >= 0)).sum(axis=0) * TRIPLE_WEIGHT
+
+            # Random tie-break (noise < smallest gain difference)
+            score = gain + self.rng.random(size) * 0.5
+            score[~available] = -1.0
+            best = int(np.argmax(score))
+            chosen.append(best)
+            available[best] = False
+
+        return sorted(int(self.pool[i]) + 1 for i in chosen)
+
+    def _mark_covered(self, ticket: List[int]):
+        idx = np.array(ticket) - 1
+        a, b = _TICKET_PAIRS
+        self.covered_pairs[PAIR_RANK[idx[a], idx[b]]] = True
+        a, b, c = _TICKET_TRIPLES
+        self.covered_triples[TRIPLE_RANK[idx[a], idx[b], idx[c]]] = True
+
+    def design(self, count: int, forbidden_keys: Set[str]) -> List[List[int]]:
+        """
+        Generate `count` unique tickets not present in forbidden_keys
+        forbidden_keys is updated with every accepted ticket
+        """
+        tickets = []
+        pool_numbers = [int(n) + 1 for n in self.pool]
+
+        for _ in range(count):
+            ticket = self._next_ticket()
+            retries = 0
+            while norm_key(ticket) in forbidden_keys:
+                retries += 1
+                if retries <= MAX_TICKET_RETRIES:
+                    ticket = self._next_ticket()
+                else:
+                    # Greedy keeps landing on taken keys - fall back to random pool sample
+                    ticket = sorted(int(n) for n in self.rng.choice(pool_numbers, size=6, replace=False))
+                if retries > MAX_TICKET_RETRIES + 5000:
+                    raise RuntimeError("Could not find unique combination after many attempts")
+
+            forbidden_keys.add(norm_key(ticket))
+            self._mark_covered(ticket)
+            tickets.append(ticket)
+
+        return tickets
+
+    def coverage_summary(self) -> dict:
+        """Covered vs total pairs/triples within the pool"""
+        size = len(self.pool)
+        pairs_total = comb(size, 2)
+        triples_total = comb(size, 3)
+        pairs_covered = int(self.covered_pairs.sum())
+        triples_covered = int(self.covered_triples.sum())
+        return {
+            "pairs_covered": pairs_covered,
+            "pairs_total": pairs_total,
+            "pair_coverage_pct": round(100.0 * pairs_covered / pairs_total, 2),
+            "triples_covered": triples_covered,
+            "triples_total": triples_total,
+            "triple_coverage_pct": round(100.0 * triples_covered / triples_total, 2),
+        }
+
+
+def max_tickets_for_pool(pool_size: int) -> int:
+    """Number of distinct 6-number tickets that can be built from the pool"""
+    return comb(pool_size, 6)
@@ -0,0 +1,95 @@
+"""
+Per-number gap (overdue) statistics for GetLos_T
+
+A gap is the number of draws between two consecutive appearances of a
+number; the current gap counts draws since the number was last drawn.
+Positions are chronological draw positions (see history.DrawHistory).
+"""
+import numpy as np
+
+
+class GapStats:
+    """
+    Per-number gap state (index 0 = number 1)
+
+    last_pos:  position of the last appearance (-1 if never drawn)
+    count:     completed gaps (appearances - 1)
+    gap_sum:   sum of completed gaps
+    gap_sq:    sum of squared completed gaps
+    max_gap:   longest completed gap
+    draws:     draws seen
+    """
+
+    def __init__(self):
+        self.last_pos = np.full(49, -1, dtype=np.int64)
+        self.count = np.zeros(49, dtype=np.int64)
+        self.gap_sum = np.zeros(49, dtype=np.int64)
+        self.gap_sq = np.zeros(49, dtype=np.int64)
+        self.max_gap = np.zeros(49, dtype=np.int64)
+        self.draws = 0
+
+    @classmethod
+    def from_matrix(cls, matrix: np.ndarray) -> "GapStats":
+        """Build from (N, 6) chronological draws in one vectorized pass"""
+        stats = cls()
+        stats.draws = len(matrix)
+        if not len(matrix):
+            return stats
+
+        positions = np.repeat(np.arange(len(matrix)), 6)
+        numbers = np.asarray(matrix).ravel() - 1
+        order = np.lexsort((positions, numbers))  # by number, then position
+        numbers, positions = numbers[order], positions[order]
+
+        same = numbers[1:] == numbers[:-1]
+        gap_numbers = numbers[1:][same]
+        gaps = (positions[1:] - positions[:-1] - 1)[same]
+
+        stats.count = np.bincount(gap_numbers, minlength=49).astype(np.int64)
+        stats.gap_sum = np.bincount(gap_numbers, weights=gaps, minlength=49).astype(np.int64)
+        stats.gap_sq = np.bincount(gap_numbers, weights=gaps ** 2, minlength=49).astype(np.int64)
+        np.maximum.at(stats.max_gap, gap_numbers, gaps)
+        # Last appearance = last entry of every number run
+        last = np.append(~same, True)
+        stats.last_pos[numbers[last]] = positions[last]
+        return stats
+
+    def extended(self, matrix: np.ndarray) -> "GapStats":
+        """Copy with new chronological draws appended - O(6) per draw"""
+        stats = GapStats()
+        for name in ("last_pos", "count", "gap_sum", "gap_sq", "max_gap"):
+            setattr(stats, name, getattr(self, name).copy())
+        stats.draws = self.draws
+
+        for numbers in np.asarray(matrix).tolist():
+            pos = stats.draws
+            for n in numbers:
+                i = n - 1
+                if stats.last_pos[i] >= 0:
+                    gap = pos - stats.last_pos[i] - 1
+                    stats.count[i] += 1
+                    stats.gap_sum[i] += gap
+                    stats.gap_sq[i] += gap * gap
+                    stats.max_gap[i] = max(stats.max_gap[i], gap)
+                stats.last_pos[i] = pos
+            stats.draws += 1
+        return stats
+
+    @property
+    def current_gap(self) -> np.ndarray:
+        """Draws since last appearance (all draws if never drawn)"""
+        return np.where(self.last_pos >= 0, self.draws - 1 - self.last_pos, self.draws)
+
+    @property
+    def avg_gap(self) -> np.ndarray:
+        return np.divide(self.gap_sum, self.count, out=np.zeros(49), where=self.count > 0)
+
+    @property
+    def std_gap(self) -> np.ndarray:
+        mean_sq = np.divide(self.gap_sq, self.count, out=np.zeros(49), where=self.count > 0)
+        return np.sqrt(np.maximum(mean_sq - self.avg_gap ** 2, 0.0))
+
+    @property
+    def overdue_ratio(self) -> np.ndarray:
+        """Current gap relative to the average gap (> 1 = overdue)"""
+        return (self.current_gap + 1) / (self.avg_gap + 1)
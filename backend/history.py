@@ -0,0 +1,238 @@
+"""
+In-memory snapshot of historical draws for GetLos_T
+Loaded once per data version and shared by strategies and analytics
+
+Positions in the snapshot follow chronological order (ordered by source /
+draw date, like sequential_id). cum_counts is a prefix-sum frequency index:
+frequencies of any window [start, end) are cum_counts[end] - cum_counts[start].
+"""
+import copy
+import threading
+from bisect import bisect_left, bisect_right
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from aggregates import get_data_version
+from combinatorics import pair_count_matrix, triple_count_array, popcount64
+from gaps import GapStats
+from patterns import concat_columns, feature_columns
+from models import HistoricalDraw
+
+# Sources sort lexicographically; upper bound for "any date"
+MAX_DATE_KEY = "9999-12-31"
+
+
+def _extend_bits(bits: np.ndarray, start: int, new_matrix: np.ndarray) -> np.ndarray:
+    """
+    Copy of the (49, words) number bitsets with draws new_matrix set
+    at positions start, start + 1, ...
+    """
+    total = start + len(new_matrix)
+    out = np.zeros((49, (total + 63) // 64), dtype=np.uint64)
+    out[:, :bits.shape[1]] = bits
+    if len(new_matrix):
+        positions = np.repeat(np.arange(start, total), 6)
+        shifts = (positions % 64).astype(np.uint64)
+        np.bitwise_or.at(out, (new_matrix.ravel() - 1, positions // 64), np.left_shift(np.uint64(1), shifts))
+    return out
+
+
+def _onehot(rows: np.ndarray) -> np.ndarray:
+    """(N, 6) numbers -> (N, 49) 0/1 matrix"""
+    onehot = np.zeros((len(rows), 49), dtype=np.int32)
+    if len(rows):
+        np.put_along_axis(onehot, rows - 1, 1, axis=1)
+    return onehot
+
+
+class DrawHistory:
+    """
+    Chronologically ordered draws (oldest first, ordered by source/date)
+
+    rows:       list of sorted 6-number lists
+    matrix:     (N, 6) int array of the same numbers
+    keys:       set of normalized keys
+    date_keys:  sorted source strings ("" for missing) for bisect lookups
+    cum_counts: (N + 1, 49) cumulative per-number counts
+    cum_sums:   (N + 1, 2) cumulative draw sums and squared draw sums
+    pair_counts:   (49, 49) pair co-occurrence counts of the whole history
+    triple_counts: (18424,) triple counts by colex rank (combinatorics.TRIPLE_RANK)
+    number_bits:   (49, words) packed uint64 bitsets - bit p of number n's row
+                   is set if the draw at position p contains n
+    gaps:          per-number gap statistics of the whole history
+    features:      per-draw feature columns (patterns.FEATURES -> (N,) array)
+    """
+
+    def __init__(self, draws: list, version: int):
+        self.version = version
+        self.rows: List[List[int]] = []
+        self.ids: List[int] = []
+        self.sources: List[Optional[str]] = []
+        self.date_keys: List[str] = []
+        self.sequential_ids: List[Optional[int]] = []
+        self.keys = set()
+        self.matrix = np.zeros((0, 6), dtype=np.int64)
+        self.cum_counts = np.zeros((1, 49), dtype=np.int32)
+        self.cum_sums = np.zeros((1, 2), dtype=np.int64)
+        self.pair_counts = pair_count_matrix(self.matrix)
+        self.triple_counts = triple_count_array(self.matrix)
+        self.number_bits = np.zeros((49, 0), dtype=np.uint64)
+        self.gaps = GapStats()
+        self.features = feature_columns(self.matrix)
+        self._append(draws)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _append(self, draws: list):
+        rows = [list(d.numbers) for d in draws]
+        self.rows.extend(rows)
+        self.ids.extend(d.id for d in draws)
+        self.sources.extend(d.source for d in draws)
+        self.date_keys.extend(d.source or "" for d in draws)
+        self.sequential_ids.extend(d.sequential_id for d in draws)
+        self.keys.update(d.key for d in draws)
+
+        new_matrix = np.asarray(rows, dtype=np.int64).reshape(-1, 6)
+        self.number_bits = _extend_bits(self.number_bits, len(self.matrix), new_matrix)
+        if len(self.matrix):
+            self.gaps = self.gaps.extended(new_matrix)
+        else:
+            self.gaps = GapStats.from_matrix(new_matrix)
+        self.features = concat_columns(self.features, feature_columns(new_matrix))
+        new_cum = self.cum_counts[-1] + np.cumsum(_onehot(new_matrix), axis=0)
+        sums = new_matrix.sum(axis=1)
+        new_cum_sums = self.cum_sums[-1] + np.cumsum(np.stack([sums, sums ** 2], axis=1), axis=0)
+        self.matrix = np.vstack([self.matrix, new_matrix])
+        self.cum_counts = np.vstack([self.cum_counts, new_cum])
+        self.cum_sums = np.vstack([self.cum_sums, new_cum_sums])
+        # New arrays (not in-place) - older snapshots may still be read
+        self.pair_counts = self.pair_counts + pair_count_matrix(new_matrix)
+        self.triple_counts = self.triple_counts + triple_count_array(new_matrix)
+
+    def can_append(self, draws: list) -> bool:
+        """True if draws sort after the latest draw (chronological append)"""
+        if not self.rows:
+            return True
+        first = min((d.source or "", d.id) for d in draws)
+        return first >= (self.date_keys[-1], self.ids[-1])
+
+    def extended(self, draws: list, version: int) -> "DrawHistory":
+        """
+        New snapshot with draws appended (this one stays unchanged for
+        readers still holding it)
+        """
+        snapshot = copy.copy(self)
+        snapshot.rows = list(self.rows)
+        snapshot.ids = list(self.ids)
+        snapshot.sources = list(self.sources)
+        snapshot.date_keys = list(self.date_keys)
+        snapshot.sequential_ids = list(self.sequential_ids)
+        snapshot.keys = set(self.keys)
+        snapshot._append(sorted(draws, key=lambda d: (d.source or "", d.id)))
+        snapshot.version = version
+        return snapshot
+
+    def window(
+        self,
+        last_n: Optional[int] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> tuple[int, int]:
+        """
+        Resolve window to positions [start, end)
+        date_from/date_to are inclusive YYYY-MM-DD bounds, last_n limits the
+        result to the newest N draws of the (date) window
+        """
+        start, end = 0, len(self.rows)
+        if date_from or date_to:
+            end = bisect_right(self.date_keys, date_to or MAX_DATE_KEY)
+            start = bisect_left(self.date_keys, date_from) if date_from else 0
+        if last_n is not None:
+            start = max(start, end - last_n)
+        return start, max(start, end)
+
+    def window_freq(self, start: int, end: int) -> np.ndarray:
+        """Per-number counts of draws in positions [start, end) - O(49)"""
+        return self.cum_counts[end] - self.cum_counts[start]
+
+    def window_sum_moments(self, start: int, end: int) -> tuple[int, int]:
+        """(sum of draw sums, sum of squared draw sums) in [start, end) - O(1)"""
+        total, total_sq = self.cum_sums[end] - self.cum_sums[start]
+        return int(total), int(total_sq)
+
+    def subset_mask(self, numbers: List[int]) -> np.ndarray:
+        """Bitset of draw positions containing all the numbers (AND of number bitsets)"""
+        return np.bitwise_and.reduce(self.number_bits[np.asarray(numbers) - 1], axis=0)
+
+    def subset_count(self, numbers: List[int]) -> int:
+        """Number of draws containing all the numbers"""
+        return int(popcount64(self.subset_mask(numbers)).sum(dtype=np.int64))
+
+    def subset_flags(self, numbers: List[int]) -> np.ndarray:
+        """Boolean array over positions - True if the draw contains all the numbers"""
+        mask = self.subset_mask(numbers).astype("<u8")
+        return np.unpackbits(mask.view(np.uint8), bitorder="little")[:len(self.rows)].astype(bool)
+
+    def subset_positions(self, numbers: List[int]) -> np.ndarray:
+        """Positions (oldest first) of draws containing all the numbers"""
+        return np.flatnonzero(self.subset_flags(numbers))
+
+    def window_gaps(self, start: int, end: int) -> GapStats:
+        """Gap statistics of draws in positions [start, end)"""
+        if (start, end) == (0, len(self.rows)):
+            return self.gaps
+        return GapStats.from_matrix(self.matrix[start:end])
+
+    def window_combo_counts(self, start: int, end: int) -> tuple[np.ndarray, np.ndarray]:
+        """(pair matrix, triple counts) of draws in positions [start, end)"""
+        if (start, end) == (0, len(self.rows)):
+            return self.pair_counts, self.triple_counts
+        window = self.matrix[start:end]
+        return pair_count_matrix(window), triple_count_array(window)
+
+
+_cache_lock = threading.Lock()
+_cached_history: Optional[DrawHistory] = None
+
+_DRAW_COLUMNS = (
+    HistoricalDraw.id, HistoricalDraw.numbers, HistoricalDraw.key,
+    HistoricalDraw.source, HistoricalDraw.sequential_id
+)
+
+
+def _load_history(db: Session, version: int) -> DrawHistory:
+    draws = db.query(*_DRAW_COLUMNS).order_by(HistoricalDraw.source, HistoricalDraw.id).all()
+    return DrawHistory(draws, version)
+
+
+def get_history(db: Session) -> DrawHistory:
+    """
+    Return cached draw history for the current data version
+
+    Draws appended after the cached snapshot (ids above the cached maximum,
+    sorting after the latest draw, no deletes in between) only extend the
+    prefix sums; any other change reloads the snapshot from the database.
+    """
+    global _cached_history
+    version = get_data_version(db)
+
+    with _cache_lock:
+        cached = _cached_history
+        if cached is not None and cached.version == version:
+            return cached
+
+        if cached is not None and cached.ids:
+            new_draws = db.query(*_DRAW_COLUMNS).filter(
+                HistoricalDraw.id > max(cached.ids)
+            ).all()
+            total = db.query(func.count(HistoricalDraw.id)).scalar()
+            if new_draws and total == len(cached) + len(new_draws) and cached.can_append(new_draws):
+                _cached_history = cached.extended(new_draws, version)
+                return _cached_history
+
+        _cached_history = _load_history(db, version)
+        return _cached_history
@@ -0,0 +1,362 @@
+"""
+Data integrity verification for GetLos_T (incremental, with watermark)
+
+A full scan checks all draws; afterwards integrity_state keeps the highest
+verified draw id and the state of every check, so the next verify only
+inspects draws added since. Deletes, in-place changes (mark_dirty), draws
+dated before the verified range and calendar regeneration force a full scan.
+Every function here only modifies the session - callers commit
+"""
+from datetime import date, timedelta
+from typing import List, Optional
+
+from sqlalchemy import Column, Integer, MetaData, Table, func, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from models import ExpectedDrawDate, HistoricalDraw, IntegrityState
+from schedules import ensure_expected_dates, get_schedule_index, missing_draw_dates
+
+# Missing-date check starts here (API has reliable data from 2007)
+API_RELIABLE_START_DATE = date(2007, 1, 1)
+
+
+def _draw_date(draw) -> Optional[date]:
+    if draw.source and len(draw.source) == 10:
+        try:
+            return date.fromisoformat(draw.source)
+        except ValueError:
+            return None
+    return None
+
+
+def _key_issue(draw, duplicate_of: int) -> dict:
+    return {
+        "type": "duplicate",
+        "severity": "error",
+        "description": f"Duplicate draw found: {draw.numbers} (date: {draw.source})",
+        "details": {"id": draw.id, "duplicate_of": duplicate_of, "key": draw.key},
+    }
+
+
+def _api_id_issue(draw, duplicate_of: int) -> dict:
+    return {
+        "type": "duplicate",
+        "severity": "error",
+        "description": f"Duplicate draw_system_id: {draw.draw_system_id}",
+        "details": {"id": draw.id, "duplicate_of": duplicate_of},
+    }
+
+
+def _dated_draws(db: Session, after_id: int = 0):
+    return db.query(HistoricalDraw).filter(
+        HistoricalDraw.source.isnot(None),
+        HistoricalDraw.id > after_id
+    ).order_by(HistoricalDraw.source, HistoricalDraw.id).all()
+
+
+def _missing_between(db: Session, date_from: date, date_to: date) -> List[str]:
+    date_from = max(date_from, API_RELIABLE_START_DATE)
+    if date_from > date_to:
+        return []
+    return [str(d) for d in missing_draw_dates(db, date_from, date_to)]
+
+
+def full_scan(db: Session) -> dict:
+    """Check all draws - returns per-check state"""
+    draws = _dated_draws(db)
+    checks = {
+        "total_draws": len(draws),
+        "duplicate_keys": [],
+        "duplicate_api_ids": [],
+        "api_ids": None,
+        "dates": None,
+        "sequential": None,
+        "reference": {},
+    }
+    if not draws:
+        return checks
+
+    # 1. Duplicates by key
+    seen_keys = {}
+    for draw in draws:
+        if draw.key in seen_keys:
+            checks["duplicate_keys"].append(_key_issue(draw, seen_keys[draw.key]))
+        else:
+            seen_keys[draw.key] = draw.id
+
+    # 2. Duplicates by draw_system_id, 3. range for gap detection
+    seen_api_ids = {}
+    for draw in draws:
+        if draw.draw_system_id is None:
+            continue
+        if draw.draw_system_id in seen_api_ids:
+            checks["duplicate_api_ids"].append(_api_id_issue(draw, seen_api_ids[draw.draw_system_id]))
+        else:
+            seen_api_ids[draw.draw_system_id] = draw.id
+    if seen_api_ids:
+        checks["api_ids"] = {"min": min(seen_api_ids), "max": max(seen_api_ids), "distinct": len(seen_api_ids)}
+
+    # 4. Missing dates (calendar anti-join)
+    dates = [d for d in (_draw_date(draw) for draw in draws) if d]
+    if dates and len(draws) > 1:
+        checks["dates"] = {
+            "min": str(min(dates)),
+            "max": str(max(dates)),
+            "missing": _missing_between(db, min(dates), max(dates)),
+        }
+
+    # 5. sequential_id: must be exactly 1..count
+    seq_ids = [d.sequential_id for d in draws if d.sequential_id is not None]
+    if seq_ids:
+        checks["sequential"] = {
+            "count": len(seq_ids), "distinct": len(set(seq_ids)), "min": min(seq_ids), "max": max(seq_ids)
+        }
+
+    # Reference metadata
+    reliable = [d for d in draws if (_draw_date(d) or date.min) >= API_RELIABLE_START_DATE]
+    checks["reference"] = {
+        "lottery_start_date": draws[0].source,
+        "lottery_start_sequential_id": draws[0].sequential_id,
+        "api_reliable_start_sequential_id": reliable[0].sequential_id if reliable else None,
+        "historical_era_draws_count": sum(1 for d in draws if _draw_date(d) and _draw_date(d) < API_RELIABLE_START_DATE),
+    }
+    return checks
+
+
+def _incremental_scan(db: Session, checks: dict, watermark_id: int, new_draws: list) -> dict:
+    """Update check state with draws added after the watermark (all dated after verified range)"""
+    checks = dict(checks)
+    new_ids = [d.id for d in new_draws]
+
+    # 1. Duplicates by key (against verified draws and within new ones)
+    keys = {d.key for d in new_draws}
+    old_keys = dict(db.query(HistoricalDraw.key, HistoricalDraw.id).filter(
+        HistoricalDraw.key.in_(keys), HistoricalDraw.id.notin_(new_ids), HistoricalDraw.source.isnot(None)
+    ).all())
+    duplicate_keys = list(checks["duplicate_keys"])
+    for draw in new_draws:
+        if draw.key in old_keys:
+            duplicate_keys.append(_key_issue(draw, old_keys[draw.key]))
+        else:
+            old_keys[draw.key] = draw.id
+    checks["duplicate_keys"] = duplicate_keys
+
+    # 2./3. draw_system_id duplicates and range
+    api_ids = {d.draw_system_id for d in new_draws if d.draw_system_id is not None}
+    if api_ids:
+        seen = dict(db.query(HistoricalDraw.draw_system_id, HistoricalDraw.id).filter(
+            HistoricalDraw.draw_system_id.in_(api_ids),
+            HistoricalDraw.id.notin_(new_ids),
+            HistoricalDraw.source.isnot(None)
+        ).all())
+        duplicate_api_ids = list(checks["duplicate_api_ids"])
+        added = 0
+        for draw in new_draws:
+            if draw.draw_system_id is None:
+                continue
+            if draw.draw_system_id in seen:
+                duplicate_api_ids.append(_api_id_issue(draw, seen[draw.draw_system_id]))
+            else:
+                seen[draw.draw_system_id] = draw.id
+                added += 1
+        checks["duplicate_api_ids"] = duplicate_api_ids
+        previous = checks["api_ids"] or {"min": min(api_ids), "max": max(api_ids), "distinct": 0}
+        checks["api_ids"] = {
+            "min": min(previous["min"], min(api_ids)),
+            "max": max(previous["max"], max(api_ids)),
+            "distinct": previous["distinct"] + added,
+        }
+
+    # 4. Missing dates - only the range after the last verified date
+    dates = [d for d in (_draw_date(draw) for draw in new_draws) if d]
+    if dates:
+        previous = checks["dates"]
+        old_max = date.fromisoformat(previous["max"])
+        new_max = max(dates)
+        checks["dates"] = {
+            "min": previous["min"],
+            "max": str(max(old_max, new_max)),
+            "missing": previous["missing"] + _missing_between(db, old_max + timedelta(days=1), new_max),
+        }
+
+    # 5. sequential_id
+    seq_ids = [d.sequential_id for d in new_draws if d.sequential_id is not None]
+    if seq_ids:
+        # Distinct values already used by verified draws (not rows - those may repeat)
+        taken = {s for (s,) in db.query(HistoricalDraw.sequential_id).filter(
+            HistoricalDraw.sequential_id.in_(set(seq_ids)),
+            HistoricalDraw.id.notin_(new_ids),
+            HistoricalDraw.source.isnot(None)
+        ).distinct()}
+        previous = checks["sequential"] or {"count": 0, "distinct": 0, "min": min(seq_ids), "max": max(seq_ids)}
+        checks["sequential"] = {
+            "count": previous["count"] + len(seq_ids),
+            "distinct": previous["distinct"] + len(set(seq_ids) - taken),
+            "min": min(previous["min"], min(seq_ids)),
+            "max": max(previous["max"], max(seq_ids)),
+        }
+
+    # Reference metadata (new draws are newer than all verified ones)
+    reference = dict(checks["reference"])
+    if reference.get("api_reliable_start_sequential_id") is None:
+        reliable = [d for d in new_draws if (_draw_date(d) or date.min) >= API_RELIABLE_START_DATE]
+        if reliable:
+            reference["api_reliable_start_sequential_id"] = reliable[0].sequential_id
+    reference["historical_era_draws_count"] = (reference.get("historical_era_draws_count") or 0) + sum(
+        1 for d in new_draws if _draw_date(d) and _draw_date(d) < API_RELIABLE_START_DATE
+    )
+    checks["reference"] = reference
+    checks["total_draws"] = checks["total_draws"] + len(new_draws)
+    return checks
+
+
+def _can_extend(db: Session, state: Optional[IntegrityState], calendar_id: Optional[int], new_draws: list) -> bool:
+    if state is None or state.needs_full_scan or state.calendar_id != calendar_id:
+        return False
+    checks = state.checks
+    if not checks.get("dates") or not checks.get("total_draws"):
+        return False
+    # Rows removed without a hook
+    total = db.query(func.count(HistoricalDraw.id)).filter(HistoricalDraw.source.isnot(None)).scalar()
+    if total != checks["total_draws"] + len(new_draws):
+        return False
+    # Draws dated inside the verified range shift the boundaries - rescan
+    return all((d.source or "") > checks["dates"]["max"] for d in new_draws)
+
+
+def verify(db: Session, full: bool = False) -> tuple[dict, str, int]:
+    """
+    Run integrity checks, incrementally when possible
+    Returns (per-check state, "full" / "incremental", draws inspected)
+    """
+    ensure_expected_dates(db)  # extend the calendar first - regeneration changes calendar_id
+    state = db.query(IntegrityState).first()
+    calendar_id = db.query(func.max(ExpectedDrawDate.id)).scalar()
+    max_id = db.query(func.max(HistoricalDraw.id)).scalar() or 0
+
+    new_draws = _dated_draws(db, after_id=state.watermark_id) if state and not full else []
+    if not full and _can_extend(db, state, calendar_id, new_draws):
+        checks = _incremental_scan(db, state.checks, state.watermark_id, new_draws) if new_draws else state.checks
+        scan, inspected = "incremental", len(new_draws)
+    else:
+        checks = full_scan(db)
+        scan, inspected = "full", checks["total_draws"]
+
+    if state is None:
+        state = IntegrityState()
+        db.add(state)
+    state.watermark_id = max_id
+    state.calendar_id = calendar_id
+    state.needs_full_scan = 0
+    state.checks = checks
+    return checks, scan, inspected
+
+
+def mark_dirty(db: Session):
+    """Force a full scan on next verify (draws deleted or modified in place)"""
+    db.query(IntegrityState).update({IntegrityState.needs_full_scan: 1}, synchronize_session=False)
+
+
+def build_issues(db: Session, checks: dict) -> List[dict]:
+    """Issues (IntegrityIssue fields) from per-check state"""
+    issues = list(checks["duplicate_keys"]) + list(checks["duplicate_api_ids"])
+
+    api_ids = checks.get("api_ids")
+    if api_ids and api_ids["distinct"] > 1:
+        expected_count = api_ids["max"] - api_ids["min"] + 1
+        if api_ids["distinct"] < expected_count:
+            missing_count = expected_count - api_ids["distinct"]
+            issues.append({
+                "type": "gap_in_sequence",
+                "severity": "warning",
+                "description": f"Missing {missing_count} draw(s) in draw_system_id sequence ({api_ids['min']}-{api_ids['max']})",
+                "details": {"min_id": api_ids["min"], "max_id": api_ids["max"], "missing_count": missing_count},
+            })
+
+    dates = checks.get("dates")
+    if dates and dates["missing"]:
+        missing = dates["missing"]
+        min_date = max(date.fromisoformat(dates["min"]), API_RELIABLE_START_DATE)
+        # Harmonogram context for missing dates
+        schedule_index = get_schedule_index(db)
+        schedule_contexts = []
+        for missing_date in missing:
+            context = schedule_index.context_for(missing_date)
+            if context and context not in schedule_contexts:
+                schedule_contexts.append(context)
+        issues.append({
+            "type": "missing_date",
+            "severity": "warning",
+            "description": f"Missing {len(missing)} draw date(s) between {min_date} and {dates['max']}",
+            "details": {
+                "count": len(missing),
+                "first_missing": missing[0],
+                "last_missing": missing[-1],
+                "missing_dates": missing,
+                "schedule_context": schedule_contexts,
+            },
+        })
+
+    seq = checks.get("sequential")
+    if seq and not (seq["distinct"] == seq["count"] and seq["min"] == 1 and seq["max"] == seq["count"]):
+        issues.append({
+            "type": "broken_sequential_id",
+            "severity": "warning",
+            "description": "Sequential IDs are not continuous 1,2,3...",
+            "details": {"expected_max": seq["count"], "actual_ids": seq["distinct"]},
+        })
+    return issues
+
+
+def renumber_sequential_ids(db: Session) -> int:
+    """
+    Renumber sequential_id of dated draws to 1..N in date order (set-based)
+    The first draw whose number differs from its ROW_NUMBER() (read-only
+    window) starts the changed range: only draws from there on are numbered
+    into a temp table, offset from the draw before it, and one
+    UPDATE ... FROM touches rows whose number changed.
+    Returns rows updated (does not commit)
+    """
+    db.flush()
+    order = (HistoricalDraw.source, HistoricalDraw.id)
+    numbered = select(
+        HistoricalDraw.source, HistoricalDraw.id, HistoricalDraw.sequential_id.label("seq"),
+        func.row_number().over(order_by=order).label("position")
+    ).where(HistoricalDraw.source.isnot(None)).subquery()
+    first = db.execute(
+        select(numbered.c.source, numbered.c.id, numbered.c.position)
+        .where(numbered.c.seq.is_distinct_from(numbered.c.position))
+        .order_by(numbered.c.source, numbered.c.id)
+        .limit(1)
+    ).first()
+    if first is None:
+        return 0
+
+    seq_map = Table(
+        "seq_renumber", MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("seq", Integer, nullable=False),
+        prefixes=["TEMPORARY"]
+    )
+    conn = db.connection()
+    seq_map.create(conn)
+    try:
+        conn.execute(seq_map.insert().from_select(
+            ["id", "seq"],
+            select(
+                HistoricalDraw.id,
+                func.row_number().over(order_by=order) + (first.position - 1)
+            ).where(
+                HistoricalDraw.source.isnot(None),
+                tuple_(*order) >= (first.source, first.id)
+            )
+        ))
+        result = conn.execute(
+            update(HistoricalDraw)
+            .where(HistoricalDraw.id == seq_map.c.id)
+            .where(HistoricalDraw.sequential_id.is_distinct_from(seq_map.c.seq))
+            .values(sequential_id=seq_map.c.seq)
+        )
+    finally:
+        seq_map.drop(conn)
+    return result.rowcount
@@ -2,29 +2,285 @@
 Lotto.pl API Client
 Official API documentation: https://developers.lotto.pl/
 """
+import asyncio
 import httpx
 import os
+import random
+import time
+from collections import deque
 from typing import List, Dict, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime
 from dotenv import load_dotenv
 
+import api_cache
+
 load_dotenv()
 
 LOTTO_API_BASE_URL = "https://developers.lotto.pl/api/open/v1"
 LOTTO_API_SECRET = os.getenv("LOTTO_API_SECRET_KEY", "")
 
+# Shared client: connection pool with keep-alive, HTTP/2 when h2 is installed
+POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0)
+# Per-endpoint timeouts
+LAST_RESULTS_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+BY_DATE_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+DEFAULT_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+# Concurrent per-day fetching
+MAX_CONCURRENCY = 10  # requests in flight per fetch
+RATE_PER_SECOND = 20.0  # sustained request rate (shared by all fetches)
+BURST = 20  # requests allowed at once after idle time
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5  # seconds, doubled per attempt (full jitter)
+
+# Circuit breaker: open when too many of the recent requests failed
+BREAKER_WINDOW = 20  # recent requests considered
+BREAKER_MIN_REQUESTS = 5  # before the failure rate counts
+BREAKER_FAILURE_RATE = 0.5
+BREAKER_COOLDOWN = 30.0  # seconds open before a trial request (half-open)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_client: Optional[httpx.AsyncClient] = None
+_bucket: Optional["TokenBucket"] = None
+
 
 class LottoAPIError(Exception):
     """Custom exception for Lotto API errors"""
     pass
 
 
-async def get_last_results_for_lotto(limit: int = 10) -> List[Dict]:
+class LottoAPITransientError(LottoAPIError):
+    """Rate limit (429), server error (5xx) or network error - safe to retry"""
+    pass
+
+
+class LottoAPIUnavailableError(LottoAPIError):
+    """Circuit breaker is open - request not sent (fail fast, do not retry)"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker for the API
+    closed: requests pass, outcomes of the last BREAKER_WINDOW are tracked
+    open: requests fail immediately until BREAKER_COOLDOWN passes
+    half_open: one trial request; success closes, failure re-opens
+    Every state change (and each trial) starts a new generation; outcomes
+    of requests admitted in an earlier generation are ignored
+    """
+
+    def __init__(self):
+        self.state = "closed"
+        self.outcomes = deque(maxlen=BREAKER_WINDOW)  # True = failure
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.generation = 0
+        self.last_error: Optional[str] = None
+        self.times_opened = 0
+
+    def before_request(self) -> int:
+        """
+        Admit a request: returns its token (generation) for record/release,
+        raises LottoAPIUnavailableError if it may not be sent
+        """
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < BREAKER_COOLDOWN:
+                raise LottoAPIUnavailableError(
+                    f"Lotto.pl API unavailable (circuit open, retry in {self.retry_after():.0f}s): {self.last_error}"
+                )
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self.trial_in_flight:
+                raise LottoAPIUnavailableError("Lotto.pl API unavailable (circuit half-open, trial request pending)")
+            self.trial_in_flight = True
+            self.generation += 1
+        return self.generation
+
+    def record(self, token: int, failed: bool, error: Optional[str] = None):
+        if token != self.generation:
+            return  # admitted before the last state change (or not the trial)
+        if failed:
+            self.last_error = error
+        if self.state == "half_open":
+            self.trial_in_flight = False
+            if failed:
+                self._open()
+            else:
+                self.state = "closed"
+                self.outcomes.clear()
+                self.generation += 1
+            return
+        self.outcomes.append(failed)
+        if (self.state == "closed" and len(self.outcomes) >= BREAKER_MIN_REQUESTS
+                and sum(self.outcomes) / len(self.outcomes) >= BREAKER_FAILURE_RATE):
+            self._open()
+
+    def release(self, token: int):
+        """Request ended without an outcome (cancelled)"""
+        if self.state == "half_open" and token == self.generation:
+            self.trial_in_flight = False
+
+    def _open(self):
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        self.generation += 1
+
+    def retry_after(self) -> float:
+        if self.state != "open":
+            return 0.0
+        return max(0.0, BREAKER_COOLDOWN - (time.monotonic() - self.opened_at))
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "failure_rate": round(sum(self.outcomes) / len(self.outcomes), 3) if self.outcomes else 0.0,
+            "recent_requests": len(self.outcomes),
+            "retry_after": round(self.retry_after(), 1),
+            "times_opened": self.times_opened,
+            "last_error": self.last_error,
+        }
+
+
+breaker = CircuitBreaker()
+
+
+async def _get(client: httpx.AsyncClient, url: str, **kwargs) -> httpx.Response:
+    """GET through the circuit breaker (network errors, 429 and 5xx count as failures)"""
+    token = breaker.before_request()
+    try:
+        response = await client.get(url, **kwargs)
+    except httpx.RequestError as e:
+        breaker.record(token, True, f"{type(e).__name__}: {e}")
+        raise
+    except BaseException:
+        breaker.release(token)  # cancelled - not an upstream outcome
+        raise
+    failed = response.status_code == 429 or response.status_code >= 500
+    breaker.record(token, failed, f"status {response.status_code}" if failed else None)
+    return response
+
+
+class TokenBucket:
+    """Async token bucket: acquire() waits until a request may be sent"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def open_client() -> httpx.AsyncClient:
+    """Create the application-wide client and rate limiter (startup)"""
+    global _client, _bucket
+    if _client is None or _client.is_closed:
+        _bucket = TokenBucket(RATE_PER_SECOND, BURST)
+        _client = httpx.AsyncClient(
+            base_url=LOTTO_API_BASE_URL,
+            headers={"accept": "application/json"},
+            limits=POOL_LIMITS,
+            timeout=DEFAULT_TIMEOUT,
+            http2=HTTP2_AVAILABLE
+        )
+    return _client
+
+
+async def close_client():
+    """Close the application-wide client (shutdown)"""
+    global _client, _bucket
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        _bucket = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Shared client (opened on first use outside the app lifecycle)"""
+    return open_client()
+
+
+def ensure_api_key():
+    """Raise LottoAPIError if the API key is not configured"""
+    if not LOTTO_API_SECRET or LOTTO_API_SECRET == "your_api_key_here":
+        raise LottoAPIError("LOTTO_API_SECRET_KEY not configured")
+
+
+def _extract_items(data) -> List[Dict]:
+    """Draws from a response body (paginated dict with 'items', list or single object)"""
+    if isinstance(data, dict) and 'items' in data:
+        return data['items']
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        return [data]
+    return []
+
+
+async def fetch_draws_by_date(client: httpx.AsyncClient, draw_date: date) -> List[Dict]:
+    """
+    Fetch Lotto draws of a single day using an open client (get_client())
+    
+    Returns:
+        Raw draw results ([] when the API has no draw for the date)
+    
+    Raises:
+        LottoAPITransientError: 429 / 5xx / network error (retryable)
+        LottoAPIError: any other failure
+    """
+    params = {
+        "gameType": "Lotto",
+        "drawDate": draw_date.strftime("%Y-%m-%d"),
+        "index": 1,
+        "size": 10,
+        "sort": "drawDate",
+        "order": "DESC"
+    }
+    
+    try:
+        response = await _get(
+            client,
+            "/lotteries/draw-results/by-date-per-game",
+            headers={"secret": LOTTO_API_SECRET}, params=params, timeout=BY_DATE_TIMEOUT
+        )
+    except httpx.RequestError as e:
+        raise LottoAPITransientError(f"Network error: {str(e)}")
+    
+    if response.status_code == 200:
+        return _extract_items(response.json())
+    if response.status_code == 404:
+        return []
+    if response.status_code == 401:
+        raise LottoAPIError("Unauthorized: Invalid API key")
+    if response.status_code == 429 or response.status_code >= 500:
+        raise LottoAPITransientError(f"API request failed with status {response.status_code}")
+    raise LottoAPIError(f"API request failed with status {response.status_code}: {response.text}")
+
+
+async def get_last_results_for_lotto(limit: int = 10, client: Optional[httpx.AsyncClient] = None) -> List[Dict]:
     """
     Fetch the latest Lotto results from the official API
     
     Args:
         limit: Number of recent results to fetch (default 10)
+        client: HTTP client (default: shared client)
     
     Returns:
         List of draw results with structure:
@@ -47,178 +303,123 @@ async def get_last_results_for_lotto(limit: int = 10) -> List[Dict]:
             "Get your API key from kontakt@lotto.pl and add it to .env file"
         )
     
-    url = f"{LOTTO_API_BASE_URL}/lotteries/draw-results/last-results-per-game"
-    headers = {
-        "accept": "application/json",
-        "secret": LOTTO_API_SECRET
-    }
+    url = "/lotteries/draw-results/last-results-per-game"
+    headers = {"secret": LOTTO_API_SECRET}
     # Note: API might not support 'limit' parameter
     # If it fails, it will return only the last result per game type
     params = {
         "gameType": "Lotto"
     }
     
+    cached = api_cache.get("last-results", params)
+    if cached is not None:
+        return cached
+    
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url, headers=headers, params=params)
-            
-            # Log the request for debugging
-            print(f"Lotto API Request: {url}")
-            print(f"Params: {params}")
-            print(f"Status: {response.status_code}")
-            
-            if response.status_code == 401:
-                raise LottoAPIError("Unauthorized: Invalid API key")
-            elif response.status_code == 404:
-                print(f"API returned 404: {response.text}")
-                return []  # No results found
-            elif response.status_code != 200:
-                error_text = response.text
-                print(f"API Error Response: {error_text}")
-                raise LottoAPIError(f"API request failed with status {response.status_code}: {error_text}")
-            
-            data = response.json()
-            print(f"API returned data type: {type(data)}, length: {len(data) if isinstance(data, list) else 'N/A'}")
-            return data if isinstance(data, list) else [data]
-            
+        client = client or get_client()
+        response = await _get(client, url, headers=headers, params=params, timeout=LAST_RESULTS_TIMEOUT)
+        
+        # Log the request for debugging
+        print(f"Lotto API Request: {url}")
+        print(f"Params: {params}")
+        print(f"Status: {response.status_code}")
+        
+        if response.status_code == 401:
+            raise LottoAPIError("Unauthorized: Invalid API key")
+        elif response.status_code == 404:
+            print(f"API returned 404: {response.text}")
+            api_cache.put("last-results", params, [], api_cache.LATEST_TTL)
+            return []  # No results found
+        elif response.status_code != 200:
+            error_text = response.text
+            print(f"API Error Response: {error_text}")
+            raise LottoAPIError(f"API request failed with status {response.status_code}: {error_text}")
+        
+        data = response.json()
+        print(f"API returned data type: {type(data)}, length: {len(data) if isinstance(data, list) else 'N/A'}")
+        results = data if isinstance(data, list) else [data]
+        api_cache.put("last-results", params, results, api_cache.LATEST_TTL)
+        return results
+        
     except httpx.RequestError as e:
         raise LottoAPIError(f"Network error while fetching from Lotto API: {str(e)}")
 
 
-async def get_results_by_date_range(
-    date_from: datetime,
-    date_to: Optional[datetime] = None
-) -> List[Dict]:
+async def _fetch_with_retry(client: httpx.AsyncClient, bucket: TokenBucket, draw_date: date) -> List[Dict]:
+    for attempt in range(MAX_RETRIES + 1):
+        await bucket.acquire()
+        try:
+            return await fetch_draws_by_date(client, draw_date)
+        except LottoAPITransientError:
+            if attempt == MAX_RETRIES:
+                raise
+            await asyncio.sleep(random.uniform(0, BACKOFF_BASE * 2 ** attempt))
+
+
+async def fetch_draws_for_dates(
+    draw_dates: List[date],
+    client: Optional[httpx.AsyncClient] = None,
+    concurrency: int = MAX_CONCURRENCY
+) -> tuple[Dict[date, List[Dict]], Dict[date, str]]:
     """
-    Fetch Lotto results starting from a specific date
-    
-    Args:
-        date_from: Start date (will fetch all draws from this date onwards)
-        date_to: End date (optional, defaults to now, used for limiting results)
+    Fetch draws of many days concurrently (bounded by `concurrency`, rate
+    limited, transient errors retried with jittered backoff); answers
+    come from the response cache (api_cache) when present
     
     Returns:
-        List of draw results sorted by date (newest first)
-    """
-    if not LOTTO_API_SECRET or LOTTO_API_SECRET == "your_api_key_here":
-        raise LottoAPIError(
-            "LOTTO_API_SECRET_KEY not configured. "
-            "Get your API key from kontakt@lotto.pl and add it to .env file"
-        )
+        (date -> raw draws, date -> error message for dates that failed)
     
-    if date_to is None:
-        date_to = datetime.now()
-    
-    url = f"{LOTTO_API_BASE_URL}/lotteries/draw-results/by-date-per-game"
-    headers = {
-        "accept": "application/json",
-        "secret": LOTTO_API_SECRET
-    }
-    
-    all_results = []
-    
-    # API uses pagination, fetch all pages
-    # Start from page 1, get 100 results per page
-    params = {
-        "gameType": "Lotto",
-        "drawDate": date_from.strftime("%Y-%m-%d"),  # Format: YYYY-MM-DD
-        "index": 1,      # Page number (starts at 1)
-        "size": 100,     # Results per page
-        "sort": "drawDate",  # Sort by draw date
-        "order": "DESC"      # Newest first
-    }
-    
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url, headers=headers, params=params)
-            
-            if response.status_code == 401:
-                raise LottoAPIError("Unauthorized: Invalid API key")
-            elif response.status_code == 404:
-                return []
-            elif response.status_code != 200:
-                raise LottoAPIError(f"API request failed with status {response.status_code}: {response.text}")
-            
-            data = response.json()
-            
-            # API may return single object or list
-            if isinstance(data, list):
-                all_results.extend(data)
-            elif isinstance(data, dict):
-                # Check if it's paginated response with 'items' field
-                if 'items' in data:
-                    all_results.extend(data['items'])
-                else:
-                    all_results.append(data)
-            
-            return all_results
-            
-    except httpx.RequestError as e:
-        raise LottoAPIError(f"Network error: {str(e)}")
+    Raises:
+        LottoAPIError: If API key is missing
+    """
+    ensure_api_key()
+    if client is None:
+        client = get_client()
+        bucket = _bucket
+    else:
+        bucket = TokenBucket(RATE_PER_SECOND, BURST)
+    semaphore = asyncio.Semaphore(concurrency)
+    results: Dict[date, List[Dict]] = {}
+    errors: Dict[date, str] = {}
+
+    async def fetch(draw_date: date):
+        params = {"drawDate": draw_date.strftime("%Y-%m-%d")}
+        cached = api_cache.get("by-date", params)
+        if cached is not None:
+            results[draw_date] = cached
+            return
+        async with semaphore:
+            try:
+                results[draw_date] = await _fetch_with_retry(client, bucket, draw_date)
+            except LottoAPIError as e:
+                errors[draw_date] = str(e)
+                return
+        api_cache.put("by-date", params, results[draw_date], api_cache.draw_date_ttl(draw_date, results[draw_date]))
+
+    await asyncio.gather(*(fetch(d) for d in draw_dates))
+    return results, errors
 
 
-async def fetch_multiple_draws_by_dates(start_date: datetime, end_date: datetime) -> List[Dict]:
+async def fetch_multiple_draws_by_dates(
+    draw_dates: List[date],
+    client: Optional[httpx.AsyncClient] = None,
+    concurrency: int = MAX_CONCURRENCY
+) -> tuple[List[Dict], Dict[date, str]]:
     """
-    Fetch multiple lottery draws by generating draw dates
-    
-    Lotto draws happen on: Tuesday, Thursday, Saturday at 21:00
-    This function generates all draw dates in the range and fetches them.
+    Fetch draws for a list of draw dates concurrently
     
     Args:
-        start_date: Starting date
-        end_date: Ending date
+        draw_dates: Expected draw dates (schedules.expected_draw_dates - the
+                    schedule-aware calendar, also for pre-2007 eras)
+        client: HTTP client (default: shared client)
+        concurrency: Maximum requests in flight
     
     Returns:
-        List of all draw results in the date range
+        (all draw results in date order, date -> error for dates that failed)
     """
-    if not LOTTO_API_SECRET or LOTTO_API_SECRET == "your_api_key_here":
-        raise LottoAPIError("LOTTO_API_SECRET_KEY not configured")
-    
-    # Draw days: Tuesday=1, Thursday=3, Saturday=5
-    draw_weekdays = {1, 3, 5}
-    
-    all_draws = []
-    current = start_date
-    
-    url = f"{LOTTO_API_BASE_URL}/lotteries/draw-results/by-date-per-game"
-    headers = {
-        "accept": "application/json",
-        "secret": LOTTO_API_SECRET
-    }
-    
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        while current <= end_date:
-            # Check if this day is a draw day
-            if current.weekday() in draw_weekdays:
-                params = {
-                    "gameType": "Lotto",
-                    "drawDate": current.strftime("%Y-%m-%d"),
-                    "index": 1,
-                    "size": 10,
-                    "sort": "drawDate",
-                    "order": "DESC"
-                }
-                
-                try:
-                    response = await client.get(url, headers=headers, params=params)
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        if isinstance(data, dict) and 'items' in data:
-                            all_draws.extend(data['items'])
-                        elif isinstance(data, list):
-                            all_draws.extend(data)
-                        elif isinstance(data, dict):
-                            all_draws.append(data)
-                    elif response.status_code != 404:
-                        print(f"Warning: Failed to fetch draw for {current.strftime('%Y-%m-%d')}: {response.status_code}")
-                
-                except httpx.RequestError as e:
-                    print(f"Warning: Network error for {current.strftime('%Y-%m-%d')}: {e}")
-            
-            # Move to next day
-            current += timedelta(days=1)
-    
-    return all_draws
+    results, errors = await fetch_draws_for_dates(draw_dates, client=client, concurrency=concurrency)
+    all_draws = [draw for d in sorted(results) for draw in results[d]]
+    return all_draws, errors
 
 
 def parse_lotto_draw(draw_data: Dict) -> Optional[Dict]:
@@ -2,37 +2,60 @@
 GetLos_T - Main FastAPI Application
 Lottery number prediction system
 """
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from typing import List, Optional
+from typing import List, Literal, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from datetime import datetime, timedelta
-import csv, io, random, math, os, json
+from datetime import datetime, timedelta, date
+import csv, io, random, math, os, json, threading
 import yaml
 from pathlib import Path
-from collections import Counter
-from itertools import combinations
 from dotenv import load_dotenv
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
 
 from db import get_db, init_db
-from models import HistoricalDraw, Pick, DrawSchedule, norm_key
+from models import HistoricalDraw, Pick, DrawSchedule, MarkovTransitions, StatsAggregate, norm_key
 from schema import (
-    Numbers, Stats, Strategy, GenerateRequest, 
+    Numbers, Stats, GenerateRequest, 
     UploadResponse, DrawResponse, PickResponse, SyncLottoResponse,
     ManualDrawRequest, BackupResponse, BatchDeleteRequest,
-    IntegrityReport, IntegrityIssue, IntegrityFixResponse,
-    DrawScheduleCreate, DrawScheduleResponse
+    IntegrityReport, IntegrityIssue, IntegrityFixResponse, ApiCacheStats,
+    DrawScheduleCreate, DrawScheduleResponse,
+    CoverageRequest, CoverageResponse, SystemBetRequest, SystemBetResponse,
+    DrawWindow, SubsetQueryResponse, NumberGap, GapsResponse,
+    PatternQueryRequest, PatternQueryResponse, DistributionsResponse, TrendsResponse,
+    RandomnessTestsResponse, SimilarDrawsRequest, TicketSimilarity
 )
+from combinatorics import PAIR_NUMBERS, TRIPLE_NUMBERS, pair_counts_by_rank, top_k_ranks
+from coverage import CoverageDesigner, max_tickets_for_pool
+from system_bets import expand_system, evaluate_system
+import markov
+import aggregates
+import patterns
+import trends
+import randomness
+import similarity
+import integrity
+import backfill
+from schedules import (
+    on_schedules_changed, ensure_expected_dates,
+    expected_draw_dates, missing_draw_dates
+)
+from history import get_history
+from strategies import (
+    STRATEGIES, get_strategy_context, sample_strategy, warmup_strategies
+)
+import lotto_api
+import api_cache
 from lotto_api import (
     get_last_results_for_lotto, 
     parse_lotto_draw, 
     LottoAPIError, 
-    get_results_by_date_range,
-    fetch_multiple_draws_by_dates
+    LottoAPIUnavailableError,
+    fetch_multiple_draws_by_dates,
+    fetch_draws_for_dates
 )
 
 # Load environment variables
@@ -62,6 +85,22 @@ def startup_event():
     """Initialize database tables and load schedules from YAML on startup"""
     init_db()
     load_schedules_from_yaml()
+    init_expected_draw_dates()
+    init_stats_aggregate()
+    init_markov_transitions()
+    threading.Thread(target=warmup_strategies_background, daemon=True).start()
+
+
+@app.on_event("startup")
+async def open_lotto_client():
+    """Open the pooled Lotto.pl API client (keep-alive across requests)"""
+    lotto_api.open_client()
+
+
+@app.on_event("shutdown")
+async def close_lotto_client():
+    """Close pooled API connections"""
+    await lotto_api.close_client()
 
 
 def load_schedules_from_yaml():
@@ -96,6 +135,7 @@ def load_schedules_from_yaml():
             )
             db.add(schedule)
         
+        on_schedules_changed(db)
         db.commit()
     except Exception as e:
         print(f"[!] Blad przy ladowaniu harmonogramow z YAML: {e}")
@@ -103,6 +143,109 @@ def load_schedules_from_yaml():
 
 
 
+def init_expected_draw_dates():
+    """Build expected draw calendar on first start or when it nears its horizon"""
+    try:
+        db = next(get_db())
+        if ensure_expected_dates(db):
+            db.commit()
+    except Exception as e:
+        print(f"[!] Blad przy budowaniu kalendarza losowan: {e}")
+
+
+def init_stats_aggregate():
+    """Build materialized stats on first start or when they drifted from the tables"""
+    try:
+        db = next(get_db())
+        agg = db.query(StatsAggregate).first()
+        if (agg is None
+                or agg.total_draws != db.query(HistoricalDraw).count()
+                or agg.total_picks != db.query(Pick).count()):
+            aggregates.rebuild_aggregate(db)
+            db.commit()
+    except Exception as e:
+        print(f"[!] Blad przy budowaniu statystyk: {e}")
+
+
+def init_markov_transitions():
+    """Build transition matrix on first start (existing databases)"""
+    try:
+        db = next(get_db())
+        if db.query(MarkovTransitions).first() is None:
+            markov.rebuild_transitions(db)
+            db.commit()
+    except Exception as e:
+        print(f"[!] Blad przy budowaniu macierzy przejsc: {e}")
+
+
+def warmup_strategies_background():
+    """Precompute all registered strategies so first requests match steady state"""
+    try:
+        db = next(get_db())
+        warmed = warmup_strategies(db)
+        print(f"[+] Strategie rozgrzane: {', '.join(warmed)}")
+    except Exception as e:
+        print(f"[!] Blad przy rozgrzewaniu strategii: {e}")
+
+
+def on_draws_added(db: Session, new_draws: List[HistoricalDraw]):
+    """
+    Update incrementally maintained analytics after inserting draws
+    Call before commit so everything lands in the same transaction
+    """
+    aggregates.record_draws_added(db, [d.numbers for d in new_draws])
+    markov.record_draws(db, new_draws)
+
+
+def on_draws_removed(db: Session, removed_rows: List[List[int]]):
+    """
+    Update maintained analytics after deleting draws (numbers of deleted rows)
+    Call after the delete statement and before commit
+    """
+    aggregates.record_draws_removed(db, removed_rows)
+    markov.rebuild_transitions(db)
+    integrity.mark_dirty(db)
+
+
+def on_draws_changed(db: Session):
+    """
+    Rebuild maintained analytics after history was modified in place
+    (clear-all, integrity fixes). Call after the change and before commit
+    """
+    aggregates.rebuild_aggregate(db)
+    markov.rebuild_transitions(db)
+    integrity.mark_dirty(db)
+
+
+def on_picks_changed(db: Session, delta: int):
+    """Update pick count after inserting (delta > 0) or deleting picks"""
+    aggregates.record_picks_delta(db, delta)
+
+
+def draw_window(
+    last_n: Optional[int] = Query(None, ge=1, description="Only the newest N draws"),
+    date_from: Optional[date] = Query(None, description="From date (inclusive)"),
+    date_to: Optional[date] = Query(None, description="To date (inclusive)"),
+    as_of: Optional[date] = Query(None, description="History as known on this date")
+) -> DrawWindow:
+    """Common window query parameters (as_of = date_to)"""
+    if as_of and (date_to is None or as_of < date_to):
+        date_to = as_of
+    return DrawWindow(last_n=last_n, date_from=date_from, date_to=date_to)
+
+
+def resolve_window(db: Session, history, window: DrawWindow, schedule_id: Optional[int] = None) -> tuple[int, int]:
+    """Positions [start, end) of a draw window, optionally limited to a schedule era"""
+    start, end = history.window(**window.bounds())
+    if schedule_id is not None:
+        schedule = db.query(DrawSchedule).filter(DrawSchedule.id == schedule_id).first()
+        if not schedule:
+            raise HTTPException(404, f"Schedule {schedule_id} not found")
+        era_start, era_end = history.window(date_from=schedule.date_from, date_to=schedule.date_to)
+        start, end = max(start, era_start), max(start, min(end, era_end))
+    return start, end
+
+
 def parse_csv_bytes(b: bytes) -> List[tuple]:
     """
     Parse CSV bytes and extract draw data
@@ -151,237 +294,13 @@ def parse_csv_bytes(b: bytes) -> List[tuple]:
     return out
 
 
-def histogram_1_49(rows: List[List[int]]) -> List[int]:
-    """Calculate frequency of each number (1-49)"""
-    freq = [0] * 49
-    for row in rows:
-        for n in row:
-            freq[n - 1] += 1
-    return freq
-
-
-def get_top_pairs_triples(rows: List[List[int]], top_n: int = 30):
-    """
-    Return most frequent pairs and triples
-    Used for combo_based strategy
-    """
-    pair_counter = Counter()
-    triple_counter = Counter()
-    
-    for draw in rows:
-        for pair in combinations(sorted(draw), 2):
-            pair_counter[pair] += 1
-        for triple in combinations(sorted(draw), 3):
-            triple_counter[triple] += 1
-    
-    top_pairs = [set(p) for p, _ in pair_counter.most_common(top_n)]
-    top_triples = [set(t) for t, _ in triple_counter.most_common(top_n)]
-    
-    return top_pairs, top_triples
-
-
-def pick_with_ai(all_rows: List[List[int]], freq: List[int]) -> List[int]:
-    """
-    AI-based prediction using machine learning
-    Analyzes historical patterns, sequences, and statistical features
-    """
-    if not all_rows or len(all_rows) < 20:
-        # Not enough data for AI, fallback to balanced
-        return pick_with_strategy(freq, "balanced", all_rows)
-    
-    # Prepare features from historical data
-    features = []
-    labels = []
-    
-    # Create training data from sequences
-    for i in range(len(all_rows) - 1):
-        current = all_rows[i]
-        next_draw = all_rows[i + 1]
-        
-        # Features: frequency, sum, even/odd ratio, gaps
-        feature_vec = [
-            sum(current),  # Sum of numbers
-            len([n for n in current if n % 2 == 0]),  # Even count
-            max(current) - min(current),  # Range
-            freq[current[0] - 1] if current else 0,  # Freq of first number
-            freq[current[-1] - 1] if current else 0,  # Freq of last number
-        ]
-        
-        # Add gap features (differences between consecutive numbers)
-        gaps = [current[j+1] - current[j] for j in range(len(current)-1)]
-        feature_vec.extend(gaps + [0] * (5 - len(gaps)))  # Pad to 5 gaps
-        
-        features.append(feature_vec)
-        
-        # Label: binary vector indicating which numbers appeared
-        label = [1 if i in next_draw else 0 for i in range(1, 50)]
-        labels.append(label)
-    
-    # Train multiple binary classifiers (one per number)
-    X = np.array(features)
-    y = np.array(labels)
-    
-    # Predict probabilities for each number
-    predictions = []
-    for num_idx in range(49):
-        if len(np.unique(y[:, num_idx])) > 1:  # Only if we have both classes
-            clf = RandomForestClassifier(n_estimators=10, max_depth=5, random_state=42)
-            clf.fit(X, y[:, num_idx])
-            
-            # Use last draw as input for prediction
-            last_draw = all_rows[-1]
-            test_feature = [
-                sum(last_draw),
-                len([n for n in last_draw if n % 2 == 0]),
-                max(last_draw) - min(last_draw),
-                freq[last_draw[0] - 1],
-                freq[last_draw[-1] - 1],
-            ]
-            gaps = [last_draw[j+1] - last_draw[j] for j in range(len(last_draw)-1)]
-            test_feature.extend(gaps + [0] * (5 - len(gaps)))
-            
-            prob = clf.predict_proba([test_feature])[0][1]  # Probability of appearing
-        else:
-            prob = freq[num_idx] / (sum(freq) + 1)  # Fallback to frequency
-        
-        predictions.append((num_idx + 1, prob))
-    
-    # Sort by probability and select top numbers with some randomness
-    predictions.sort(key=lambda x: x[1], reverse=True)
-    
-    # Smart selection: mix high-probability numbers with some randomness
-    picks = set()
-    
-    # Take top 3 most probable
-    for num, _ in predictions[:8]:
-        picks.add(num)
-        if len(picks) >= 3:
-            break
-    
-    # Add 2-3 numbers from medium probability (weighted random)
-    mid_prob = predictions[8:25]
-    weights = [p[1] for p in mid_prob]
-    if sum(weights) > 0:
-        selected = np.random.choice(
-            [p[0] for p in mid_prob],
-            size=min(3, len(mid_prob)),
-            replace=False,
-            p=np.array(weights) / sum(weights)
-        )
-        # Convert numpy.int64 to Python int
-        picks.update([int(x) for x in selected])
-    
-    # Fill remaining if needed
-    while len(picks) < 6:
-        remaining = [n for n in range(1, 50) if n not in picks]
-        picks.add(random.choice(remaining))
-    
-    # Convert numpy.int64 to Python int (JSON serializable)
-    result = [int(x) for x in sorted(list(picks)[:6])]
-    return result
-
-
-def pick_with_strategy(
-    freq: List[int], 
-    strategy: Strategy, 
-    all_rows: Optional[List[List[int]]] = None
-) -> List[int]:
-    """
-    Generate 6 numbers using specified strategy
-    
-    Strategies:
-    - random: Pure random selection
-    - hot: Favor frequently drawn numbers
-    - cold: Favor rarely drawn numbers
-    - balanced: Mix of hot (3) and cold (3) numbers
-    - combo_based: Based on frequent pairs/triples
-    - ai: Machine learning prediction based on patterns
-    """
-    universe = list(range(1, 50))
-    
-    # AI strategy
-    if strategy == "ai":
-        if all_rows and len(all_rows) >= 20:
-            return pick_with_ai(all_rows, freq)
-        else:
-            # Not enough data, fallback to balanced
-            strategy = "balanced"
-    
-    # Random strategy
-    if strategy == "random":
-        return sorted(random.sample(universe, 6))
-    
-    # If no frequency data, fall back to random
-    if sum(freq) == 0:
-        return sorted(random.sample(universe, 6))
-    
-    # Hot/Cold strategies
-    if strategy in ("hot", "cold"):
-        if strategy == "hot":
-            weights = [f for f in freq]
-        else:  # cold
-            max_freq = max(freq)
-            weights = [max_freq + 1 - f for f in freq]
-        
-        weights = [max(w, 1) for w in weights]
-        picks = set()
-        attempts = 0
-        
-        while len(picks) < 6 and attempts < 1000:
-            n = random.choices(universe, weights=weights, k=1)[0]
-            picks.add(n)
-            attempts += 1
-        
-        # Fill remaining if needed
-        while len(picks) < 6:
-            picks.add(random.choice(universe))
-        
-        return sorted(list(picks)[:6])
-    
-    # Balanced strategy
-    if strategy == "balanced":
-        idx_sorted = sorted(range(49), key=lambda i: freq[i], reverse=True)
-        hot_pool = [i + 1 for i in idx_sorted[:13]]
-        cold_pool = [i + 1 for i in idx_sorted[-13:]]
-        
-        picks = set()
-        picks.update(random.sample(hot_pool, min(3, len(hot_pool))))
-        picks.update(random.sample(cold_pool, min(3, len(cold_pool))))
-        
-        while len(picks) < 6:
-            picks.add(random.randint(1, 49))
-        
-        return sorted(list(picks)[:6])
-    
-    # Combo-based strategy
-    if strategy == "combo_based":
-        if not all_rows:
-            return sorted(random.sample(universe, 6))
-        
-        top_pairs, top_triples = get_top_pairs_triples(all_rows, top_n=30)
-        
-        # Calculate weights based on pair/triple frequency
-        combo_weights = Counter()
-        for combo in top_pairs + top_triples:
-            for n in combo:
-                combo_weights[n] += 1
-        
-        weights = [combo_weights.get(i, 1) for i in range(1, 53)]
-        
-        picks = set()
-        attempts = 0
-        
-        while len(picks) < 6 and attempts < 1000:
-            n = random.choices(universe, weights=weights, k=1)[0]
-            picks.add(n)
-            attempts += 1
-        
-        while len(picks) < 6:
-            picks.add(random.choice(universe))
-        
-        return sorted(list(picks)[:6])
-    
-    return sorted(random.sample(universe, 6))
+def load_picks_by_ids(db: Session, ids: List[int], chunk_size: int = 500) -> List[Pick]:
+    """Load picks by id in chunks (keeps IN clauses below SQLite variable limit)"""
+    picks = []
+    for i in range(0, len(ids), chunk_size):
+        picks.extend(db.query(Pick).filter(Pick.id.in_(ids[i:i + chunk_size])).all())
+    picks.sort(key=lambda p: p.id)
+    return picks
 
 
 def ensure_new_combo(candidate: List[int], forbidden_keys: set[str]) -> List[int]:
@@ -413,6 +332,16 @@ def root():
     }
 
 
+@app.get("/health")
+def health():
+    """Service health; degraded while the Lotto.pl circuit breaker is not closed"""
+    circuit = lotto_api.breaker.snapshot()
+    return {
+        "status": "ok" if circuit["state"] == "closed" else "degraded",
+        "lotto_api": circuit,
+    }
+
+
 @app.post("/upload-csv", response_model=UploadResponse)
 async def upload_csv(file: UploadFile = File(...), db: Session = Depends(get_db)):
     """
@@ -447,6 +376,7 @@ async def upload_csv(file: UploadFile = File(...), db: Session = Depends(get_db)
             inserted = 0
             duplicates = 0
             keys_seen = set()
+            new_draws = []
             
             for draw in draws:
                 nums = draw.get("numbers")
@@ -473,11 +403,14 @@ async def upload_csv(file: UploadFile = File(...), db: Session = Depends(get_db)
                         "source": date_str if date_str else "json_backup",
                         "draw_system_id": None
                     }
-                    db.add(HistoricalDraw(**draw_data))
+                    new_draw = HistoricalDraw(**draw_data)
+                    db.add(new_draw)
+                    new_draws.append(new_draw)
                     inserted += 1
                 else:
                     duplicates += 1
             
+            on_draws_added(db, new_draws)
             db.commit()
             
             return UploadResponse(
@@ -504,6 +437,7 @@ async def upload_csv(file: UploadFile = File(...), db: Session = Depends(get_db)
     inserted = 0
     duplicates = 0
     keys_seen = set()
+    new_draws = []
     
     for nums, date_str in rows:
         k = norm_key(nums)
@@ -522,11 +456,14 @@ async def upload_csv(file: UploadFile = File(...), db: Session = Depends(get_db)
                 "source": date_str if date_str else "csv_upload",
                 "draw_system_id": None  # CSV uploads don't have draw system ID
             }
-            db.add(HistoricalDraw(**draw_data))
+            new_draw = HistoricalDraw(**draw_data)
+            db.add(new_draw)
+            new_draws.append(new_draw)
             inserted += 1
         else:
             duplicates += 1
     
+    on_draws_added(db, new_draws)
     db.commit()
     
     return UploadResponse(
@@ -539,18 +476,38 @@ async def upload_csv(file: UploadFile = File(...), db: Session = Depends(get_db)
 
 
 @app.get("/stats", response_model=Stats)
-def get_stats(db: Session = Depends(get_db)):
+def get_stats(window: DrawWindow = Depends(draw_window), db: Session = Depends(get_db)):
     """
     Get statistics about historical draws
-    """
-    all_draws = db.query(HistoricalDraw).all()
-    all_picks = db.query(Pick).all()
-    all_rows = [draw.numbers for draw in all_draws]
     
-    if not all_rows:
+    Whole history is served from the materialized stats_aggregate row in
+    constant time. Windows (last_n, date_from, date_to, as_of) take counts
+    and sum moments from the prefix-sum index of the cached history in
+    constant time; min/max sum is one vectorized pass over the window's
+    precomputed sum column (O(window))
+    """
+    agg = aggregates.get_aggregate(db)
+    
+    if window.is_full:
+        total_draws = agg.total_draws
+        freq = agg.freq
+        sum_total, sum_sq_total = agg.sum_total, agg.sum_sq_total
+        # Min/max sum from sum histogram (stays correct after deletes)
+        used_sums = [i + aggregates.MIN_SUM for i, c in enumerate(agg.sum_hist) if c > 0]
+        min_sum, max_sum = (used_sums[0], used_sums[-1]) if used_sums else (0, 0)
+    else:
+        history = get_history(db)
+        start, end = history.window(**window.bounds())
+        total_draws = end - start
+        freq = history.window_freq(start, end).tolist()
+        sum_total, sum_sq_total = history.window_sum_moments(start, end)
+        sums = history.features["sum"][start:end]
+        min_sum, max_sum = (int(sums.min()), int(sums.max())) if total_draws else (0, 0)
+    
+    if not total_draws:
         return Stats(
             total_draws=0,
-            total_picks=len(all_picks),
+            total_picks=agg.total_picks,
             coverage_pct=0.0,
             freq=[0] * 49,
             min_sum=0,
@@ -560,7 +517,6 @@ def get_stats(db: Session = Depends(get_db)):
             least_frequent=[]
         )
     
-    freq = histogram_1_49(all_rows)
     total_combinations = math.comb(49, 6)
     
     # Get most and least frequent numbers
@@ -568,19 +524,110 @@ def get_stats(db: Session = Depends(get_db)):
     most_freq = sorted(freq_with_nums, key=lambda x: x[1], reverse=True)[:10]
     least_freq = sorted(freq_with_nums, key=lambda x: x[1])[:10]
     
+    avg_sum = sum_total / total_draws
+    variance = max(sum_sq_total / total_draws - avg_sum ** 2, 0.0)
+    
     return Stats(
-        total_draws=len(all_rows),
-        total_picks=len(all_picks),
-        coverage_pct=round(100.0 * len(all_rows) / total_combinations, 10),
+        total_draws=total_draws,
+        total_picks=agg.total_picks,
+        coverage_pct=round(100.0 * total_draws / total_combinations, 10),
         freq=freq,
-        min_sum=min((sum(r) for r in all_rows)),
-        max_sum=max((sum(r) for r in all_rows)),
-        avg_sum=round(sum(sum(r) for r in all_rows) / len(all_rows), 2),
+        min_sum=min_sum,
+        max_sum=max_sum,
+        avg_sum=round(avg_sum, 2),
+        sum_std=round(math.sqrt(variance), 2),
         most_frequent=most_freq,
         least_frequent=least_freq
     )
 
 
+@app.get("/distributions", response_model=DistributionsResponse)
+def get_distributions(window: DrawWindow = Depends(draw_window), db: Session = Depends(get_db)):
+    """
+    Distributions of draw sums, even count, low count (1-24), range,
+    decade spread, consecutive pairs and max gap
+    Compact format: {"start": first value, "counts": [...]} per feature
+    """
+    history = get_history(db)
+    start, end = history.window(**window.bounds())
+    return patterns.window_distributions(history, start, end)
+
+
+@app.get("/trends", response_model=TrendsResponse)
+def get_trends(
+    rolling: int = Query(100, ge=1, description="Draws per rolling window"),
+    points: int = Query(150, ge=2, le=2000, description="Max points per series"),
+    numbers: Optional[List[int]] = Query(None, description="Numbers to include (default: all)"),
+    window: DrawWindow = Depends(draw_window),
+    db: Session = Depends(get_db)
+):
+    """
+    Rolling frequency of numbers over time, for charts
+    Computed from cumulative counts and downsampled with bucket averages
+    """
+    if numbers and any(n < 1 or n > 49 for n in numbers):
+        raise HTTPException(400, "All numbers must be in range 1-49")
+    
+    history = get_history(db)
+    start, end = history.window(**window.bounds())
+    return trends.frequency_trends(history, start, end, rolling, points, sorted(set(numbers or [])))
+
+
+@app.get("/randomness-tests", response_model=RandomnessTestsResponse)
+def get_randomness_tests(
+    schedule_id: Optional[int] = Query(None, description="Only draws of this schedule era"),
+    window: DrawWindow = Depends(draw_window),
+    db: Session = Depends(get_db)
+):
+    """
+    Randomness tests of draw history: chi-square uniformity of frequencies,
+    runs tests, pair independence and serial correlation
+    """
+    history = get_history(db)
+    start, end = resolve_window(db, history, window, schedule_id)
+    return randomness.randomness_tests(history, start, end)
+
+
+@app.get("/gaps", response_model=GapsResponse)
+def get_gaps(window: DrawWindow = Depends(draw_window), db: Session = Depends(get_db)):
+    """
+    Per-number gap statistics: draws since last seen, longest and average gap
+    Maintained with the cached history (windows are computed on demand)
+    """
+    history = get_history(db)
+    start, end = history.window(**window.bounds())
+    gaps = history.window_gaps(start, end)
+    current, avg, std, ratio = gaps.current_gap, gaps.avg_gap, gaps.std_gap, gaps.overdue_ratio
+    
+    numbers = []
+    for i in range(49):
+        last = int(gaps.last_pos[i])
+        seen = last >= 0
+        numbers.append(NumberGap(
+            number=i + 1,
+            appearances=int(gaps.count[i]) + 1 if seen else 0,
+            last_seen_sequential_id=history.sequential_ids[start + last] if seen else None,
+            last_seen_date=history.sources[start + last] if seen else None,
+            current_gap=int(current[i]),
+            max_gap=int(max(gaps.max_gap[i], current[i])),
+            avg_gap=round(float(avg[i]), 2),
+            std_gap=round(float(std[i]), 2),
+            overdue_ratio=round(float(ratio[i]), 3)
+        ))
+    return GapsResponse(total_draws=end - start, numbers=numbers)
+
+
+@app.post("/stats/rebuild")
+def rebuild_stats(db: Session = Depends(get_db)):
+    """
+    Recompute materialized statistics from scratch
+    Only needed if the database was modified outside of the API
+    """
+    agg = aggregates.rebuild_aggregate(db)
+    db.commit()
+    return {"success": True, "total_draws": agg.total_draws, "total_picks": agg.total_picks}
+
+
 @app.post("/generate", response_model=List[PickResponse])
 def generate_picks(
     request: GenerateRequest,
@@ -588,22 +635,22 @@ def generate_picks(
 ):
     """
     Generate new lottery picks using specified strategy
+    Available strategies: GET /strategies
+    Optional window (last_n, date_from, date_to) limits the history strategies see
     """
+    if request.strategy not in STRATEGIES:
+        raise HTTPException(400, f"Unknown strategy '{request.strategy}'. Available: {', '.join(STRATEGIES)}")
+    
+    # Strategy context (weights, pools, top combos) is built once per data version and window
+    ctx = get_strategy_context(db, **request.bounds())
+    
     # Get forbidden keys (history + existing picks)
-    hist_keys = {h.key for h in db.query(HistoricalDraw.key).all()}
     pick_keys = {p.key for p in db.query(Pick.key).all()}
-    forbidden = hist_keys | pick_keys
-    
-    # Get historical data for strategy
-    all_rows = [h.numbers for h in db.query(HistoricalDraw).all()]
-    freq = histogram_1_49(all_rows) if all_rows else [0] * 49
+    forbidden = get_history(db).keys | pick_keys
     
     results = []
     
-    for _ in range(request.count):
-        # Generate candidate
-        candidate = pick_with_strategy(freq, request.strategy, all_rows)
-        
+    for candidate in sample_strategy(ctx, request.strategy, request.count):
         # Ensure uniqueness
         candidate = ensure_new_combo(candidate, forbidden)
         k = norm_key(candidate)
@@ -618,6 +665,7 @@ def generate_picks(
         forbidden.add(k)
         results.append(new_pick)
     
+    on_picks_changed(db, len(results))
     db.commit()
     
     # Refresh to get created_at timestamps
@@ -627,6 +675,146 @@ def generate_picks(
     return results
 
 
+@app.get("/strategies")
+def list_strategies(db: Session = Depends(get_db)):
+    """
+    List registered pick strategies with their inputs and warmup state
+    """
+    ctx = get_strategy_context(db)
+    return [
+        {
+            "name": strategy.name,
+            "description": strategy.description,
+            "inputs": list(strategy.inputs),
+            "fallback": strategy.fallback,
+            "warm": ctx.is_warm(strategy.name)
+        }
+        for strategy in STRATEGIES.values()
+    ]
+
+
+@app.post("/generate-coverage", response_model=CoverageResponse)
+def generate_coverage_set(
+    request: CoverageRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Design a ticket set maximizing coverage of distinct pairs and triples
+    
+    Instead of N independent picks (which waste tickets on overlapping
+    pairs/triples) tickets are built greedily: every next number is the one
+    covering the most not-yet-covered pairs/triples.
+    
+    Pool:
+    - pool: explicit candidate numbers
+    - pool_preset: "hot" / "cold" / "balanced" (hot + cold) pools of the balanced strategy
+    - none: all 49 numbers
+    
+    Tickets are stored as picks with strategy "coverage".
+    """
+    if request.pool:
+        pool = request.pool
+    elif request.pool_preset:
+        ctx = get_strategy_context(db)
+        if not ctx.has_data:
+            raise HTTPException(400, "No historical draws - pool presets need frequency data")
+        if request.pool_preset == "hot":
+            pool = sorted(ctx.hot_pool)
+        elif request.pool_preset == "cold":
+            pool = sorted(ctx.cold_pool)
+        else:
+            pool = sorted(set(ctx.hot_pool) | set(ctx.cold_pool))
+    else:
+        pool = list(range(1, 50))
+    
+    if request.count > max_tickets_for_pool(len(pool)):
+        raise HTTPException(400, f"Pool of {len(pool)} numbers allows only {max_tickets_for_pool(len(pool))} distinct tickets")
+    
+    # Get forbidden keys (history + existing picks)
+    pick_keys = {p.key for p in db.query(Pick.key).all()}
+    forbidden = get_history(db).keys | pick_keys
+    
+    designer = CoverageDesigner(pool)
+    try:
+        tickets = designer.design(request.count, forbidden)
+    except RuntimeError as e:
+        raise HTTPException(400, str(e))
+    
+    new_picks = [Pick(numbers=t, key=norm_key(t), strategy="coverage") for t in tickets]
+    db.add_all(new_picks)
+    db.flush()
+    ids = [p.id for p in new_picks]
+    on_picks_changed(db, len(new_picks))
+    db.commit()
+    
+    return CoverageResponse(
+        success=True,
+        tickets=len(tickets),
+        pool=pool,
+        picks=load_picks_by_ids(db, ids),
+        **designer.coverage_summary()
+    )
+
+
+@app.post("/system-bet", response_model=SystemBetResponse)
+def system_bet(request: SystemBetRequest, db: Session = Depends(get_db)):
+    """
+    Expand a system ticket (7-12 numbers, up to 924 lines) and check every
+    line against historical draws
+    
+    Returns per-tier hit counts (3/4/5/6 hits) summed over all lines and draws.
+    With store=true all lines not present in history/picks are saved as picks
+    with strategy "system".
+    """
+    history = get_history(db)
+    result = evaluate_system(request.numbers, history.rows, top_n=request.top_n)
+    
+    stored = 0
+    skipped = 0
+    if request.store:
+        pick_keys = {p.key for p in db.query(Pick.key).all()}
+        forbidden = history.keys | pick_keys
+        
+        new_picks = []
+        for line in expand_system(request.numbers):
+            k = norm_key(line)
+            if k in forbidden:
+                skipped += 1
+                continue
+            forbidden.add(k)
+            new_picks.append(Pick(numbers=line, key=k, strategy="system"))
+        
+        db.add_all(new_picks)
+        on_picks_changed(db, len(new_picks))
+        db.commit()
+        stored = len(new_picks)
+    
+    return SystemBetResponse(
+        success=True,
+        numbers=request.numbers,
+        stored=stored,
+        skipped=skipped,
+        **result
+    )
+
+
+@app.post("/markov/rebuild")
+def rebuild_markov_transitions(db: Session = Depends(get_db)):
+    """
+    Recompute Markov transition matrix from scratch (one vectorized pass)
+    Normally the matrix is maintained incrementally on every new draw
+    """
+    state = markov.rebuild_transitions(db)
+    db.commit()
+    
+    return {
+        "success": True,
+        "draws": state.draws_count,
+        "transitions": int(sum(sum(row) for row in state.counts)),
+        "last_draw_date": state.last_source
+    }
+
+
 @app.post("/add-pick", response_model=PickResponse)
 def add_custom_pick(payload: Numbers, db: Session = Depends(get_db)):
     """
@@ -652,6 +840,7 @@ def add_custom_pick(payload: Numbers, db: Session = Depends(get_db)):
         strategy="manual"
     )
     db.add(new_pick)
+    on_picks_changed(db, 1)
     db.commit()
     db.refresh(new_pick)
     
@@ -710,6 +899,94 @@ def list_draws(
     }
 
 
+@app.get("/draws/containing", response_model=SubsetQueryResponse)
+def draws_containing(
+    numbers: List[int] = Query(..., description="Numbers that must all be drawn, e.g. ?numbers=3&numbers=44"),
+    include: Literal["count", "ids", "draws"] = "count",
+    limit: int = Query(50, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    Count (and optionally list) draws containing all given numbers
+    Any subset size - answered from per-number bitsets of the cached history
+    """
+    subset = sorted(set(numbers))
+    if any(n < 1 or n > 49 for n in subset):
+        raise HTTPException(400, "All numbers must be in range 1-49")
+    
+    history = get_history(db)
+    count = history.subset_count(subset)
+    page = (offset // limit) + 1
+    response = SubsetQueryResponse(
+        numbers=subset,
+        count=count,
+        total_draws=len(history),
+        page=page,
+        per_page=limit,
+        total_pages=(count + limit - 1) // limit
+    )
+    if include == "count":
+        return response
+    
+    # Most recent first, like /draws
+    positions = history.subset_positions(subset)[::-1][offset:offset + limit]
+    page_ids = [history.ids[p] for p in positions]
+    if include == "ids":
+        response.ids = page_ids
+    else:
+        by_id = {d.id: d for d in db.query(HistoricalDraw).filter(HistoricalDraw.id.in_(page_ids)).all()}
+        response.items = [DrawResponse.model_validate(by_id[i]) for i in page_ids if i in by_id]
+    return response
+
+
+@app.post("/draws/query", response_model=PatternQueryResponse)
+def query_draws(request: PatternQueryRequest, db: Session = Depends(get_db)):
+    """
+    Filter draws by feature predicates, contained numbers, window and schedule era
+    Available features: sum, even, odd, low, high, min, max, range, max_gap,
+    consecutive, decades (see patterns.FEATURES)
+    
+    Predicates are evaluated as boolean masks over precomputed feature columns
+    """
+    unknown = [f for f in list(request.features) + [request.distribution_of] if f not in patterns.FEATURES]
+    if unknown:
+        raise HTTPException(400, f"Unknown feature(s): {', '.join(unknown)}. Available: {', '.join(patterns.FEATURES)}")
+    
+    history = get_history(db)
+    start, end = resolve_window(db, history, request, request.schedule_id)
+    
+    columns = {name: col[start:end] for name, col in history.features.items()}
+    mask = np.ones(end - start, dtype=bool)
+    for name, predicate in request.features.items():
+        mask &= patterns.feature_mask(columns, name, predicate.min, predicate.max, predicate.eq)
+    if request.numbers:
+        mask &= history.subset_flags(request.numbers)[start:end]
+    
+    count = int(mask.sum())
+    response = PatternQueryResponse(
+        count=count,
+        total_draws=end - start,
+        page=(request.offset // request.limit) + 1,
+        per_page=request.limit,
+        total_pages=(count + request.limit - 1) // request.limit
+    )
+    
+    if request.include == "distribution":
+        response.distribution = {
+            "feature": request.distribution_of,
+            **patterns.distribution(columns[request.distribution_of][mask])
+        }
+    elif request.include == "draws":
+        # Most recent first, like /draws
+        positions = (start + np.flatnonzero(mask))[::-1][request.offset:request.offset + request.limit]
+        page_ids = [history.ids[p] for p in positions]
+        by_id = {d.id: d for d in db.query(HistoricalDraw).filter(HistoricalDraw.id.in_(page_ids)).all()}
+        response.items = [DrawResponse.model_validate(by_id[i]) for i in page_ids if i in by_id]
+    
+    return response
+
+
 # ========== DELETE Endpoints - /all MUST come before /{id} ==========
 
 @app.delete("/picks/all")
@@ -719,6 +996,7 @@ def clear_all_picks(db: Session = Depends(get_db)):
     """
     count = db.query(Pick).count()
     db.query(Pick).delete()
+    on_picks_changed(db, -count)
     db.commit()
     
     return {"success": True, "deleted": count}
@@ -731,6 +1009,7 @@ def clear_all_draws(db: Session = Depends(get_db)):
     """
     count = db.query(HistoricalDraw).count()
     db.query(HistoricalDraw).delete()
+    on_draws_changed(db)
     db.commit()
     
     return {"success": True, "deleted": count}
@@ -744,7 +1023,9 @@ def delete_draws_batch(request: BatchDeleteRequest, db: Session = Depends(get_db
     if not request.ids:
         return {"success": True, "deleted": 0}
     
+    removed_rows = [d.numbers for d in db.query(HistoricalDraw.numbers).filter(HistoricalDraw.id.in_(request.ids))]
     deleted = db.query(HistoricalDraw).filter(HistoricalDraw.id.in_(request.ids)).delete(synchronize_session=False)
+    on_draws_removed(db, removed_rows)
     db.commit()
     
     return {"success": True, "deleted": deleted}
@@ -760,6 +1041,7 @@ def delete_draw(draw_id: int, db: Session = Depends(get_db)):
         raise HTTPException(404, "Draw not found")
     
     db.delete(draw)
+    on_draws_removed(db, [draw.numbers])
     db.commit()
     
     return {"success": True, "message": "Draw deleted"}
@@ -774,6 +1056,7 @@ def delete_picks_batch(request: BatchDeleteRequest, db: Session = Depends(get_db
         return {"success": True, "deleted": 0}
     
     deleted = db.query(Pick).filter(Pick.id.in_(request.ids)).delete(synchronize_session=False)
+    on_picks_changed(db, -deleted)
     db.commit()
     
     return {"success": True, "deleted": deleted}
@@ -789,6 +1072,7 @@ def delete_pick(pick_id: int, db: Session = Depends(get_db)):
         raise HTTPException(404, "Pick not found")
     
     db.delete(pick)
+    on_picks_changed(db, -1)
     db.commit()
     
     return {"success": True, "message": "Pick deleted"}
@@ -814,34 +1098,44 @@ def validate_numbers(payload: Numbers, db: Session = Depends(get_db)):
     }
 
 
+@app.post("/similar-draws", response_model=List[TicketSimilarity])
+def similar_draws(request: SimilarDrawsRequest, db: Session = Depends(get_db)):
+    """
+    Historical draws sharing the most numbers with each ticket (batch)
+    Ties are broken by recency; overlap_counts gives draws per overlap 0-6
+    """
+    history = get_history(db)
+    return similarity.similar_draws(history, request.tickets, request.top_k, request.min_overlap)
+
+
 @app.get("/pairtriple-stats")
 def pairtriple_stats(limit: int = 20, db: Session = Depends(get_db)):
     """
     Get most frequent pairs and triples from historical data
+    Counts are kept with the cached history (updated on new draws)
     """
-    all_rows = [h.numbers for h in db.query(HistoricalDraw).all()]
-    
-    if not all_rows:
-        return {"pairs": [], "triples": []}
-    
-    pair_counter = Counter()
-    triple_counter = Counter()
-    
-    for draw in all_rows:
-        for pair in combinations(sorted(draw), 2):
-            pair_counter[pair] += 1
-        for triple in combinations(sorted(draw), 3):
-            triple_counter[triple] += 1
-    
-    top_pairs = pair_counter.most_common(limit)
-    top_triples = triple_counter.most_common(limit)
+    history = get_history(db)
+    pair_counts = pair_counts_by_rank(history.pair_counts)
+    triple_counts = history.triple_counts
     
     return {
-        "pairs": [{"numbers": list(p), "count": c} for p, c in top_pairs],
-        "triples": [{"numbers": list(t), "count": c} for t, c in top_triples]
+        "pairs": [
+            {"numbers": PAIR_NUMBERS[r].tolist(), "count": int(pair_counts[r])}
+            for r in top_k_ranks(pair_counts, limit)
+        ],
+        "triples": [
+            {"numbers": TRIPLE_NUMBERS[r].tolist(), "count": int(triple_counts[r])}
+            for r in top_k_ranks(triple_counts, limit)
+        ]
     }
 
 
+@app.get("/api-cache/stats", response_model=ApiCacheStats)
+def api_cache_stats():
+    """Hit rate and size of the Lotto.pl API response cache (data/api_cache.db)"""
+    return api_cache.stats()
+
+
 @app.post("/sync-lotto", response_model=SyncLottoResponse)
 async def sync_lotto_results(db: Session = Depends(get_db)):
     """
@@ -850,7 +1144,7 @@ async def sync_lotto_results(db: Session = Depends(get_db)):
     This endpoint:
     1. Fetches the latest draw from API (gets newest drawSystemId)
     2. Checks highest drawSystemId in database
-    3. Fills gaps by fetching draws for missing dates (Tue, Thu, Sat)
+    3. Fills gaps by fetching draws for expected draw dates (schedule calendar, concurrently)
     
     Uses drawSystemId to track which draws are missing and avoid duplicates.
     
@@ -915,67 +1209,41 @@ async def sync_lotto_results(db: Session = Depends(get_db)):
         
         end_date = datetime.fromisoformat(latest_api_date) if latest_api_date else datetime.now()
         
-        # Step 5: Fetch all draws in the date range (only Tue, Thu, Sat)
-        api_results = await fetch_multiple_draws_by_dates(start_date, end_date)
-        
-        # Step 6: Process and add new draws
-        new_draws_count = 0
-        latest_synced_date = None
+        # Step 5: Fetch all draws in the date range (expected draw dates from schedules)
+        # One request per expected date (concurrent, cached)
+        draw_dates = expected_draw_dates(db, start_date.date(), end_date.date())
+        api_results, fetch_errors = await fetch_multiple_draws_by_dates(draw_dates)
+        failed_dates = [str(d) for d in sorted(fetch_errors)]
         
-        for draw_data in api_results:
-            parsed = parse_lotto_draw(draw_data)
-            
-            if not parsed or not parsed["numbers"]:
-                continue
-            
-            numbers = parsed["numbers"]
-            draw_date = parsed["draw_date"]
-            draw_sys_id = parsed["draw_system_id"]
-            
-            # Check if this draw already exists (by key OR draw_system_id)
-            key = norm_key(numbers)
-            existing = db.query(HistoricalDraw).filter(
-                (HistoricalDraw.key == key) | 
-                (HistoricalDraw.draw_system_id == draw_sys_id)
-            ).first()
-            
-            if existing:
-                # Update draw_system_id if missing
-                if not existing.draw_system_id and draw_sys_id:
-                    existing.draw_system_id = draw_sys_id
-                    db.commit()
-                continue
-            
-            # Get next sequential ID
-            max_seq = db.query(func.max(HistoricalDraw.sequential_id)).scalar() or 0
-            
-            # Add new draw
-            new_draw = HistoricalDraw(
-                numbers=numbers,
-                key=key,
-                source=draw_date,
-                draw_system_id=draw_sys_id,
-                sequential_id=max_seq + 1
-            )
-            db.add(new_draw)
-            new_draws_count += 1
-            
-            if not latest_synced_date or (draw_date and draw_date > latest_synced_date):
-                latest_synced_date = draw_date
+        # Step 6: Add new draws (batch, de-duplicated by key and draw_system_id)
+        new_draws = backfill.insert_draws(db, api_results)
+        new_draws_count = len(new_draws)
+        latest_synced_date = max((d.source for d in new_draws if d.source), default=None)
         
+        on_draws_added(db, new_draws)
         db.commit()
         
         message = f"Successfully synced {new_draws_count} new draw(s) from Lotto.pl"
         if new_draws_count == 0:
             message = "Database is up to date. No new draws found."
+        if failed_dates:
+            message += f" ({len(failed_dates)} date(s) could not be fetched - run sync again)"
         
         return SyncLottoResponse(
             success=True,
             new_draws=new_draws_count,
             latest_draw_date=latest_synced_date,
-            message=message
+            message=message,
+            failed_dates=failed_dates
         )
         
+    except LottoAPIUnavailableError as e:
+        return SyncLottoResponse(
+            success=False,
+            new_draws=0,
+            message="Lotto.pl API is unavailable - sync skipped, try again later",
+            error=str(e)
+        )
     except LottoAPIError as e:
         return SyncLottoResponse(
             success=False,
@@ -1012,6 +1280,7 @@ def add_manual_draw(request: ManualDrawRequest, db: Session = Depends(get_db)):
     """
     inserted = 0
     duplicates = 0
+    new_draws = []
     
     for draw in request.draws:
         numbers = sorted(draw["numbers"])
@@ -1039,8 +1308,10 @@ def add_manual_draw(request: ManualDrawRequest, db: Session = Depends(get_db)):
             sequential_id=max_seq + 1
         )
         db.add(new_draw)
+        new_draws.append(new_draw)
         inserted += 1
     
+    on_draws_added(db, new_draws)
     db.commit()
     
     return UploadResponse(
@@ -1101,6 +1372,7 @@ def import_draws_from_json(draws_data: dict, db: Session = Depends(get_db)):
         
         draws = draws_data["draws"]
         inserted = 0
+        new_draws = []
         
         # Sort draws by date to assign sequential IDs
         draws_with_dates = []
@@ -1141,8 +1413,10 @@ def import_draws_from_json(draws_data: dict, db: Session = Depends(get_db)):
                 sequential_id=current_seq
             )
             db.add(new_draw)
+            new_draws.append(new_draw)
             inserted += 1
         
+        on_draws_added(db, new_draws)
         db.commit()
         
         return BackupResponse(
@@ -1160,38 +1434,8 @@ def import_draws_from_json(draws_data: dict, db: Session = Depends(get_db)):
         )
 
 
-def get_expected_weekdays_for_date(date_obj: datetime.date, db: Session) -> List[int]:
-    """
-    Get expected weekdays for draws based on date and configured schedules
-    Returns list of weekday numbers (0=Mon, 1=Tue, ..., 6=Sun)
-    If no schedule found, returns default [1, 3, 5] (Tue, Thu, Sat)
-    """
-    schedules = db.query(DrawSchedule).order_by(DrawSchedule.date_from).all()
-    
-    if not schedules:
-        # Default: Tue, Thu, Sat
-        return [1, 3, 5]
-    
-    date_str = str(date_obj)
-    
-    # Find matching schedule for this date
-    for schedule in schedules:
-        from_date = schedule.date_from
-        to_date = schedule.date_to or "9999-12-31"  # No end = ongoing
-        
-        if from_date <= date_str <= to_date:
-            return schedule.weekdays
-    
-    # If before all schedules, use first schedule's days
-    if date_str < schedules[0].date_from:
-        return schedules[0].weekdays
-    
-    # If after all schedules, use last schedule's days
-    return schedules[-1].weekdays
-
-
 @app.get("/verify-integrity", response_model=IntegrityReport)
-def verify_integrity(db: Session = Depends(get_db)):
+def verify_integrity(full: bool = False, db: Session = Depends(get_db)):
     """
     Verify data integrity and report issues
     
@@ -1200,152 +1444,26 @@ def verify_integrity(db: Session = Depends(get_db)):
     - Missing dates (gaps in Tuesday/Thursday/Saturday draws)
     - Gaps in draw_system_id sequence
     - Broken sequential_id numbering
-    """
-    issues = []
-    
-    # Get all draws ordered by date
-    all_draws = db.query(HistoricalDraw).filter(
-        HistoricalDraw.source.isnot(None)
-    ).order_by(HistoricalDraw.source).all()
     
-    total_draws = len(all_draws)
+    Only draws added since the last verification are inspected (watermark
+    in integrity_state); full=true forces a scan of all draws
+    """
+    checks, scan, inspected = integrity.verify(db, full=full)
+    db.commit()
     
+    total_draws = checks["total_draws"]
     if total_draws == 0:
         return IntegrityReport(
             success=True,
             has_issues=False,
             total_draws=0,
             issues=[],
-            summary="No draws to verify"
+            summary="No draws to verify",
+            scan=scan,
+            inspected_draws=inspected
         )
     
-    # 1. Check for duplicates by key
-    seen_keys = {}
-    duplicate_count = 0
-    for draw in all_draws:
-        if draw.key in seen_keys:
-            duplicate_count += 1
-            issues.append(IntegrityIssue(
-                type="duplicate",
-                severity="error",
-                description=f"Duplicate draw found: {draw.numbers} (date: {draw.source})",
-                details={"id": draw.id, "duplicate_of": seen_keys[draw.key], "key": draw.key}
-            ))
-        else:
-            seen_keys[draw.key] = draw.id
-    
-    # 2. Check for duplicates by draw_system_id
-    draws_with_api_id = [d for d in all_draws if d.draw_system_id is not None]
-    if draws_with_api_id:
-        seen_api_ids = {}
-        for draw in draws_with_api_id:
-            if draw.draw_system_id in seen_api_ids:
-                duplicate_count += 1
-                issues.append(IntegrityIssue(
-                    type="duplicate",
-                    severity="error",
-                    description=f"Duplicate draw_system_id: {draw.draw_system_id}",
-                    details={"id": draw.id, "duplicate_of": seen_api_ids[draw.draw_system_id]}
-                ))
-            else:
-                seen_api_ids[draw.draw_system_id] = draw.id
-    
-    # 3. Check for gaps in draw_system_id
-    if draws_with_api_id and len(draws_with_api_id) > 1:
-        api_ids = sorted([d.draw_system_id for d in draws_with_api_id])
-        min_id, max_id = api_ids[0], api_ids[-1]
-        expected_count = max_id - min_id + 1
-        actual_count = len(set(api_ids))
-        
-        if actual_count < expected_count:
-            missing_count = expected_count - actual_count
-            issues.append(IntegrityIssue(
-                type="gap_in_sequence",
-                severity="warning",
-                description=f"Missing {missing_count} draw(s) in draw_system_id sequence ({min_id}-{max_id})",
-                details={"min_id": min_id, "max_id": max_id, "missing_count": missing_count}
-            ))
-    
-    # 4. Check for missing dates (gaps in draw schedule)
-    # Only check from 2007 onwards (when API has reliable data)
-    # Uses configured draw schedules to determine expected days
-    API_RELIABLE_START_DATE_CHECK = datetime(2007, 1, 1).date()
-    
-    draws_with_dates = db.query(HistoricalDraw).filter(
-        HistoricalDraw.source.isnot(None)
-    ).order_by(HistoricalDraw.source).all()
-    
-    if len(draws_with_dates) > 1:
-        try:
-            dates = [datetime.fromisoformat(d.source).date() for d in draws_with_dates if d.source and len(d.source) == 10]
-            if dates:
-                # Use API reliable start date or actual min date, whichever is later
-                min_date = max(min(dates), API_RELIABLE_START_DATE_CHECK)
-                max_date = max(dates)
-                
-                # Generate expected dates using dynamic schedules
-                expected_dates = []
-                current = min_date
-                while current <= max_date:
-                    expected_weekdays = get_expected_weekdays_for_date(current, db)
-                    if current.weekday() in expected_weekdays:
-                        expected_dates.append(current)
-                    current += timedelta(days=1)
-                
-                actual_dates = set(dates)
-                missing_dates = [d for d in expected_dates if d not in actual_dates]
-                
-                if missing_dates:
-                    # Include full list of missing dates for detailed view
-                    missing_dates_str = [str(d) for d in missing_dates]
-
-                    # Add harmonogram context for missing dates
-                    # Group missing dates by applicable harmonogram
-                    schedule_contexts = []
-                    for missing_date in missing_dates:
-                        schedule = db.query(DrawSchedule).filter(
-                            DrawSchedule.date_from <= missing_date,
-                            DrawSchedule.date_to >= missing_date
-                        ).first()
-
-                        if schedule:
-                            weekdays_names = []
-                            for wd in sorted(schedule.weekdays):
-                                wd_name = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"][wd]
-                                weekdays_names.append(wd_name[:3])
-
-                            context = f"Period {schedule.date_from}-{schedule.date_to}: scheduled {', '.join(weekdays_names)}"
-                            if context not in schedule_contexts:
-                                schedule_contexts.append(context)
-
-                    issues.append(IntegrityIssue(
-                        type="missing_date",
-                        severity="warning",
-                        description=f"Missing {len(missing_dates)} draw date(s) between {min_date} and {max_date}",
-                        details={
-                            "count": len(missing_dates),
-                            "first_missing": str(missing_dates[0]),
-                            "last_missing": str(missing_dates[-1]),
-                            "missing_dates": missing_dates_str,
-                            "schedule_context": schedule_contexts
-                        }
-                    ))
-        except ValueError:
-            pass  # Skip if dates are invalid
-    
-    # 5. Check sequential_id integrity
-    draws_with_seq = [d for d in all_draws if d.sequential_id is not None]
-    if draws_with_seq:
-        seq_ids = [d.sequential_id for d in draws_with_seq]
-        expected_seq = list(range(1, len(draws_with_seq) + 1))
-        
-        if sorted(seq_ids) != expected_seq:
-            issues.append(IntegrityIssue(
-                type="broken_sequential_id",
-                severity="warning",
-                description="Sequential IDs are not continuous 1,2,3...",
-                details={"expected_max": len(draws_with_seq), "actual_ids": len(set(seq_ids))}
-            ))
+    issues = [IntegrityIssue(**issue) for issue in integrity.build_issues(db, checks)]
     
     # Generate summary
     has_issues = len(issues) > 0
@@ -1356,38 +1474,16 @@ def verify_integrity(db: Session = Depends(get_db)):
     else:
         summary = "No integrity issues found"
     
-    # Calculate reference metadata
-    API_RELIABLE_START_DATE = datetime(2007, 1, 1).date()
-    lottery_start_date = None
-    lottery_start_sequential_id = None
-    api_reliable_start_sequential_id = None
-    historical_era_draws_count = None
-    
-    if all_draws:
-        # Find oldest draw
-        oldest_draw = all_draws[0]
-        lottery_start_date = oldest_draw.source
-        lottery_start_sequential_id = oldest_draw.sequential_id
-        
-        # Find first draw from API reliable era
-        for draw in all_draws:
-            try:
-                draw_date = datetime.fromisoformat(draw.source).date()
-                if draw_date >= API_RELIABLE_START_DATE:
-                    api_reliable_start_sequential_id = draw.sequential_id
-                    break
-            except (ValueError, AttributeError):
-                continue
-        
-        # Count draws in historical era (before 2007)
-        historical_era_draws_count = sum(1 for d in all_draws 
-            if d.source and datetime.fromisoformat(d.source).date() < API_RELIABLE_START_DATE)
+    # Reference metadata
+    API_RELIABLE_START_DATE = integrity.API_RELIABLE_START_DATE
+    reference = checks["reference"]
+    lottery_start_date = reference.get("lottery_start_date")
+    lottery_start_sequential_id = reference.get("lottery_start_sequential_id")
+    api_reliable_start_sequential_id = reference.get("api_reliable_start_sequential_id")
+    historical_era_draws_count = reference.get("historical_era_draws_count")
     
     # Save to config.yaml
     try:
-        import yaml
-        from pathlib import Path
-        
         config_path = Path(__file__).parent / "config.yaml"
         config_data = {
             "lottery_start_date": lottery_start_date,
@@ -1416,7 +1512,9 @@ def verify_integrity(db: Session = Depends(get_db)):
         lottery_start_sequential_id=lottery_start_sequential_id,
         api_reliable_start_date=str(API_RELIABLE_START_DATE),
         api_reliable_start_sequential_id=api_reliable_start_sequential_id,
-        historical_era_draws_count=historical_era_draws_count
+        historical_era_draws_count=historical_era_draws_count,
+        scan=scan,
+        inspected_draws=inspected
     )
 
 
@@ -1425,54 +1523,61 @@ async def check_missing_dates(dates: List[str], db: Session = Depends(get_db)):
     """
     Check if missing dates actually exist in Lotto.pl API
     Returns status for each date: exists_in_api, exists_in_db, should_add
+    All valid dates are fetched concurrently (fetch_draws_for_dates)
     """
-    from schema import Numbers
+    date_objs = {}
+    parse_errors = {}
+    for date_str in dates:
+        try:
+            date_objs[date_str] = datetime.fromisoformat(date_str).date()
+        except ValueError as e:
+            parse_errors[date_str] = str(e)
     
-    results = []
+    in_db = {s for (s,) in db.query(HistoricalDraw.source).filter(HistoricalDraw.source.in_(list(date_objs)))}
     
+    try:
+        fetched, fetch_errors = await fetch_draws_for_dates(sorted(set(date_objs.values())))
+    except LottoAPIError as e:
+        fetched, fetch_errors = {}, {d: str(e) for d in date_objs.values()}
+    
+    results = []
     for date_str in dates:
-        try:
-            date_obj = datetime.fromisoformat(date_str).date()
-            
-            # Check if exists in database
-            exists_in_db = db.query(HistoricalDraw).filter(
-                HistoricalDraw.source == date_str
-            ).first() is not None
-            
-            # Check API
-            exists_in_api = False
-            api_numbers = None
-            api_draw_id = None
-            
-            try:
-                api_results = await fetch_multiple_draws_by_dates(date_obj, date_obj)
-                if api_results:
-                    parsed = parse_lotto_draw(api_results[0])
-                    if parsed and parsed["numbers"]:
-                        exists_in_api = True
-                        api_numbers = parsed["numbers"]
-                        api_draw_id = parsed["draw_system_id"]
-            except Exception:
-                pass
-            
-            results.append({
-                "date": date_str,
-                "exists_in_db": exists_in_db,
-                "exists_in_api": exists_in_api,
-                "should_add": exists_in_api and not exists_in_db,
-                "api_numbers": api_numbers,
-                "api_draw_id": api_draw_id,
-                "weekday": date_obj.strftime("%A")
-            })
-            
-        except Exception as e:
+        if date_str in parse_errors:
             results.append({
                 "date": date_str,
                 "exists_in_db": False,
                 "exists_in_api": False,
                 "should_add": False,
-                "error": str(e)
+                "error": parse_errors[date_str]
             })
+            continue
+        
+        date_obj = date_objs[date_str]
+        exists_in_db = date_str in in_db
+        exists_in_api = False
+        api_numbers = None
+        api_draw_id = None
+        
+        api_results = fetched.get(date_obj)
+        if api_results:
+            parsed = parse_lotto_draw(api_results[0])
+            if parsed and parsed["numbers"]:
+                exists_in_api = True
+                api_numbers = parsed["numbers"]
+                api_draw_id = parsed["draw_system_id"]
+        
+        result = {
+            "date": date_str,
+            "exists_in_db": exists_in_db,
+            "exists_in_api": exists_in_api,
+            "should_add": exists_in_api and not exists_in_db,
+            "api_numbers": api_numbers,
+            "api_draw_id": api_draw_id,
+            "weekday": date_obj.strftime("%A")
+        }
+        if date_obj in fetch_errors:
+            result["error"] = fetch_errors[date_obj]
+        results.append(result)
     
     return {
         "success": True,
@@ -1494,6 +1599,8 @@ async def fix_integrity(db: Session = Depends(get_db)):
     try:
         duplicates_removed = 0
         gaps_filled = 0
+        gaps_failed = 0
+        gap_error = None
         
         # 1. Remove duplicates by key
         all_draws = db.query(HistoricalDraw).order_by(HistoricalDraw.created_at).all()
@@ -1502,13 +1609,14 @@ async def fix_integrity(db: Session = Depends(get_db)):
         
         for draw in all_draws:
             if draw.key in seen_keys:
-                to_delete.append(draw.id)
+                to_delete.append(draw)
                 duplicates_removed += 1
             else:
                 seen_keys[draw.key] = draw.id
         
         if to_delete:
-            db.query(HistoricalDraw).filter(HistoricalDraw.id.in_(to_delete)).delete(synchronize_session=False)
+            db.query(HistoricalDraw).filter(HistoricalDraw.id.in_([d.id for d in to_delete])).delete(synchronize_session=False)
+            on_draws_removed(db, [d.numbers for d in to_delete])
             db.commit()
         
         # 2. Remove duplicates by draw_system_id
@@ -1521,13 +1629,14 @@ async def fix_integrity(db: Session = Depends(get_db)):
         
         for draw in draws_with_api_id:
             if draw.draw_system_id in seen_api_ids:
-                to_delete_api.append(draw.id)
+                to_delete_api.append(draw)
                 duplicates_removed += 1
             else:
                 seen_api_ids[draw.draw_system_id] = draw.id
         
         if to_delete_api:
-            db.query(HistoricalDraw).filter(HistoricalDraw.id.in_(to_delete_api)).delete(synchronize_session=False)
+            db.query(HistoricalDraw).filter(HistoricalDraw.id.in_([d.id for d in to_delete_api])).delete(synchronize_session=False)
+            on_draws_removed(db, [d.numbers for d in to_delete_api])
             db.commit()
         
         # 3. Fill gaps by fetching from API (only from 2007 onwards)
@@ -1537,75 +1646,48 @@ async def fix_integrity(db: Session = Depends(get_db)):
             HistoricalDraw.source.isnot(None)
         ).order_by(HistoricalDraw.source).all()
         
-        if len(draws_with_dates) > 1:
+        dates = []
+        for d in draws_with_dates:
             try:
-                dates = [datetime.fromisoformat(d.source).date() for d in draws_with_dates if d.source and len(d.source) == 10]
-                if dates:
-                    # Only check for gaps from API reliable start date onwards
-                    min_date = max(min(dates), API_RELIABLE_START_DATE)
-                    max_date = max(dates)
-                    
-                    # Generate missing dates using dynamic schedules
-                    expected_dates = []
-                    current = min_date
-                    while current <= max_date:
-                        expected_weekdays = get_expected_weekdays_for_date(current, db)
-                        if current.weekday() in expected_weekdays:
-                            expected_dates.append(current)
-                        current += timedelta(days=1)
-                    
-                    actual_dates = set(dates)
-                    missing_dates = [d for d in expected_dates if d not in actual_dates]
-                    
-                    # Fetch missing draws from API
-                    if missing_dates:
-                        # Increase limit to 50 at a time
-                        for missing_date in missing_dates[:50]:
-                            try:
-                                api_results = await fetch_multiple_draws_by_dates(missing_date, missing_date)
-                                
-                                for draw_data in api_results:
-                                    parsed = parse_lotto_draw(draw_data)
-                                    if parsed and parsed["numbers"]:
-                                        key = norm_key(parsed["numbers"])
-                                        
-                                        # Check if not exists (by key and draw_system_id)
-                                        existing_by_key = db.query(HistoricalDraw).filter_by(key=key).first()
-                                        existing_by_api_id = None
-                                        if parsed["draw_system_id"]:
-                                            existing_by_api_id = db.query(HistoricalDraw).filter_by(
-                                                draw_system_id=parsed["draw_system_id"]
-                                            ).first()
-                                        
-                                        if not existing_by_key and not existing_by_api_id:
-                                            max_seq = db.query(func.max(HistoricalDraw.sequential_id)).scalar() or 0
-                                            new_draw = HistoricalDraw(
-                                                numbers=parsed["numbers"],
-                                                key=key,
-                                                source=parsed["draw_date"],
-                                                draw_system_id=parsed["draw_system_id"],
-                                                sequential_id=max_seq + 1
-                                            )
-                                            db.add(new_draw)
-                                            gaps_filled += 1
-                            except Exception:
-                                continue  # Skip this date if API fails
-                        
-                        db.commit()
-            except Exception:
-                pass  # Skip if date parsing fails
-        
-        # 4. Renumber sequential_ids
-        all_draws_sorted = db.query(HistoricalDraw).filter(
-            HistoricalDraw.source.isnot(None)
-        ).order_by(HistoricalDraw.source).all()
+                if d.source and len(d.source) == 10:
+                    dates.append(date.fromisoformat(d.source))
+            except ValueError:
+                continue  # Skip invalid dates
+        
+        if len(draws_with_dates) > 1 and dates:
+            # Only check for gaps from API reliable start date onwards
+            min_date = max(min(dates), API_RELIABLE_START_DATE)
+            max_date = max(dates)
+            
+            # Expected dates without a draw (anti-join with expected_draw_dates)
+            missing_dates = missing_draw_dates(db, min_date, max_date)
+            
+            # Fetch missing draws from API (concurrent, rate limited)
+            if missing_dates:
+                try:
+                    api_draws, fetch_errors = await fetch_multiple_draws_by_dates(missing_dates)
+                except LottoAPIError as e:
+                    # API key missing etc. - nothing fetched
+                    api_draws, fetch_errors = [], {}
+                    gaps_failed = len(missing_dates)
+                    gap_error = str(e)
+                else:
+                    gaps_failed = len(fetch_errors)
+                    if fetch_errors:
+                        first = min(fetch_errors)
+                        gap_error = f"{gaps_failed} date(s) could not be fetched, e.g. {first}: {fetch_errors[first]}"
+                
+                new_draws = backfill.insert_draws(db, api_draws)
+                gaps_filled = len(new_draws)
+                
+                on_draws_added(db, new_draws)
+                db.commit()
         
-        sequential_ids_fixed = 0
-        for idx, draw in enumerate(all_draws_sorted, start=1):
-            if draw.sequential_id != idx:
-                draw.sequential_id = idx
-                sequential_ids_fixed += 1
+        # 4. Renumber sequential_ids (single set-based UPDATE)
+        sequential_ids_fixed = integrity.renumber_sequential_ids(db)
         
+        if sequential_ids_fixed:
+            on_draws_changed(db)
         db.commit()
         
         message = f"Fixed: {duplicates_removed} duplicates removed"
@@ -1613,13 +1695,17 @@ async def fix_integrity(db: Session = Depends(get_db)):
             message += f", {gaps_filled} gaps filled"
         if sequential_ids_fixed > 0:
             message += f", {sequential_ids_fixed} sequential IDs renumbered"
+        if gaps_failed > 0:
+            message += f", {gaps_failed} date(s) could not be fetched"
         
         return IntegrityFixResponse(
             success=True,
             duplicates_removed=duplicates_removed,
             gaps_filled=gaps_filled,
+            gaps_failed=gaps_failed,
             sequential_ids_fixed=sequential_ids_fixed,
-            message=message
+            message=message,
+            error=gap_error
         )
         
     except Exception as e:
@@ -1652,6 +1738,7 @@ def create_draw_schedule(schedule: DrawScheduleCreate, db: Session = Depends(get
         description=schedule.description
     )
     db.add(new_schedule)
+    on_schedules_changed(db)
     db.commit()
     db.refresh(new_schedule)
     return new_schedule
@@ -1668,6 +1755,7 @@ def update_draw_schedule(schedule_id: int, schedule: DrawScheduleCreate, db: Ses
     existing.date_to = schedule.date_to
     existing.weekdays = schedule.weekdays
     existing.description = schedule.description
+    on_schedules_changed(db)
     db.commit()
     db.refresh(existing)
     return existing
@@ -1681,6 +1769,7 @@ def delete_draw_schedule(schedule_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Schedule not found")
     
     db.delete(schedule)
+    on_schedules_changed(db)
     db.commit()
     return {"success": True, "message": f"Schedule {schedule_id} deleted"}
 
@@ -1701,6 +1790,7 @@ def initialize_default_schedules(db: Session = Depends(get_db)):
         description="Era współczesna (wt, czw, sob)"
     )
     db.add(default_schedule)
+    on_schedules_changed(db)
     db.commit()
     
     return {"success": True, "message": "Default schedule created", "count": 1}
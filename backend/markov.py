@@ -0,0 +1,109 @@
+"""
+Markov transition-matrix strategy for GetLos_T
+Sequence-aware picks from "number j appears in the draw after number i" counts
+"""
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models import HistoricalDraw, MarkovTransitions
+
+
+def build_transition_counts(rows: List[List[int]]) -> np.ndarray:
+    """
+    Compute (49, 49) transition counts in one vectorized pass
+    rows must be ordered chronologically (oldest first)
+    """
+    if len(rows) < 2:
+        return np.zeros((49, 49), dtype=np.int64)
+    onehot = np.zeros((len(rows), 49), dtype=np.int64)
+    arr = np.asarray(rows, dtype=np.int64) - 1
+    np.put_along_axis(onehot, arr, 1, axis=1)
+    return onehot[:-1].T @ onehot[1:]
+
+
+def _ordering_key(source: Optional[str]) -> str:
+    """Draws are ordered by source (date) - NULL sorts first like in SQLite"""
+    return source or ""
+
+
+def rebuild_transitions(db: Session) -> MarkovTransitions:
+    """
+    Recompute transition matrix from scratch (does not commit)
+    """
+    db.flush()  # pending inserts/deletes must be visible (autoflush is off)
+    draws = db.query(HistoricalDraw.numbers, HistoricalDraw.source).order_by(
+        HistoricalDraw.source, HistoricalDraw.id
+    ).all()
+    rows = [d.numbers for d in draws]
+    counts = build_transition_counts(rows)
+    
+    state = db.query(MarkovTransitions).first()
+    if state is None:
+        state = MarkovTransitions()
+        db.add(state)
+    
+    state.counts = counts.tolist()
+    state.last_numbers = list(draws[-1].numbers) if draws else None
+    state.last_source = draws[-1].source if draws else None
+    state.draws_count = len(draws)
+    return state
+
+
+def record_draws(db: Session, new_draws: List[HistoricalDraw]):
+    """
+    Update transition matrix for newly added draws (does not commit)
+    
+    Draws appended after the current latest draw cost O(36) each.
+    Anything inserted in the middle of history triggers a full rebuild.
+    """
+    if not new_draws:
+        return
+    
+    state = db.query(MarkovTransitions).first()
+    if state is None:
+        rebuild_transitions(db)
+        return
+    
+    ordered = sorted(new_draws, key=lambda d: _ordering_key(d.source))
+    if state.last_numbers and _ordering_key(ordered[0].source) < _ordering_key(state.last_source):
+        rebuild_transitions(db)
+        return
+    
+    counts = np.asarray(state.counts, dtype=np.int64)
+    last = state.last_numbers
+    for draw in ordered:
+        if last:
+            counts[np.ix_(np.asarray(last) - 1, np.asarray(draw.numbers) - 1)] += 1
+        last = list(draw.numbers)
+    
+    # New object so SQLAlchemy detects the JSON change
+    state.counts = counts.tolist()
+    state.last_numbers = last
+    state.last_source = ordered[-1].source
+    state.draws_count = (state.draws_count or 0) + len(ordered)
+
+
+def transition_weights(db: Session) -> Optional[np.ndarray]:
+    """
+    Weights for every number (index 0 = number 1): row sums of the
+    transition matrix for numbers of the latest draw
+    Returns None when there is no transition data
+    """
+    state = db.query(MarkovTransitions).first()
+    if state is None or not state.last_numbers:
+        return None
+    
+    counts = np.asarray(state.counts, dtype=np.float64)
+    weights = counts[np.asarray(state.last_numbers) - 1].sum(axis=0)
+    if weights.sum() == 0:
+        return None
+    return weights
+
+
+def pick_with_markov(weights: np.ndarray) -> List[int]:
+    """Weighted sample of 6 distinct numbers (+1 smoothing so every number is possible)"""
+    p = (weights + 1) / (weights + 1).sum()
+    picks = np.random.choice(np.arange(1, 50), size=6, replace=False, p=p)
+    return sorted(int(n) for n in picks)
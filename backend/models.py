@@ -73,3 +73,79 @@ class DrawSchedule(Base):
     
     def __repr__(self):
         return f"<DrawSchedule(id={self.id}, from={self.date_from}, to={self.date_to}, days={self.weekdays})>"
+
+
+class MarkovTransitions(Base):
+    """
+    Transition counts between consecutive draws (single row)
+    counts[i][j] = how many times number j+1 appeared in the draw following
+    a draw that contained number i+1 (draws ordered by date)
+    """
+    __tablename__ = "markov_transitions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    counts = Column(JSON, nullable=False)  # 49x49 nested list
+    last_numbers = Column(JSON, nullable=True)  # numbers of the latest draw
+    last_source = Column(String, nullable=True)  # source (date) of the latest draw - ordering key
+    draws_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<MarkovTransitions(draws={self.draws_count}, last={self.last_source})>"
+
+
+class StatsAggregate(Base):
+    """
+    Materialized statistics of historical draws and picks (single row)
+    Updated in the same transaction as every insert/delete of draws and picks
+    """
+    __tablename__ = "stats_aggregate"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    freq = Column(JSON, nullable=False)  # per-number counts, index 0 = number 1
+    sum_hist = Column(JSON, nullable=False)  # histogram of draw sums, index 0 = sum 21 (1+2+...+6)
+    sum_total = Column(Integer, nullable=False, default=0)  # sum of draw sums
+    sum_sq_total = Column(Integer, nullable=False, default=0)  # sum of squared draw sums
+    total_draws = Column(Integer, nullable=False, default=0)
+    total_picks = Column(Integer, nullable=False, default=0)
+    data_version = Column(Integer, nullable=False, default=0)  # bumped on every change of draws
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<StatsAggregate(draws={self.total_draws}, picks={self.total_picks}, version={self.data_version})>"
+
+
+class ExpectedDrawDate(Base):
+    """
+    Materialized calendar of expected draw dates (generated from draw_schedules)
+    Regenerated whenever schedules change; anti-joined with historical_draws
+    to find missing draws
+    """
+    __tablename__ = "expected_draw_dates"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    draw_date = Column(String, unique=True, index=True, nullable=False)  # YYYY-MM-DD
+    weekday = Column(Integer, nullable=False)  # 0=Monday, ..., 6=Sunday
+    schedule_id = Column(Integer, nullable=True)  # schedule the date comes from (null = default days)
+    
+    def __repr__(self):
+        return f"<ExpectedDrawDate({self.draw_date}, schedule={self.schedule_id})>"
+
+
+class IntegrityState(Base):
+    """
+    Verification watermark of /verify-integrity (single row)
+    Draws with id <= watermark_id are verified; checks holds per-check state
+    so a routine verify only inspects newer draws
+    """
+    __tablename__ = "integrity_state"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    watermark_id = Column(Integer, nullable=False, default=0)  # highest verified historical_draws.id
+    calendar_id = Column(Integer, nullable=True)  # max expected_draw_dates.id at verification (changes on regeneration)
+    needs_full_scan = Column(Integer, nullable=False, default=1)  # set when draws were deleted/modified
+    checks = Column(JSON, nullable=False)  # per-check state (duplicates, draw_system_id range, dates, sequential_id)
+    verified_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<IntegrityState(watermark={self.watermark_id}, full={self.needs_full_scan})>"
@@ -0,0 +1,112 @@
+"""
+Per-draw feature columns and vectorized pattern queries for GetLos_T
+Features are derived from the (N, 6) draw matrix once per history snapshot;
+predicates compile to boolean masks over the columns
+"""
+from typing import Dict, Optional
+
+import numpy as np
+
+from version_cache import VersionedLRU
+
+LOW_MAX = 24  # 1-24 low, 25-49 high
+
+# Features included in /distributions
+DISTRIBUTION_FEATURES = ("sum", "even", "low", "range", "decades", "consecutive", "max_gap")
+
+# Distributions of the current data version keyed by window
+MAX_CACHED_DISTRIBUTIONS = 16
+
+FEATURES = {
+    "sum": "Sum of numbers",
+    "even": "Even numbers count",
+    "odd": "Odd numbers count",
+    "low": f"Numbers 1-{LOW_MAX} count",
+    "high": f"Numbers {LOW_MAX + 1}-49 count",
+    "min": "Smallest number",
+    "max": "Largest number",
+    "range": "Largest - smallest number",
+    "max_gap": "Largest difference between neighbouring numbers",
+    "consecutive": "Pairs of consecutive numbers (e.g. 7-8)",
+    "decades": "Distinct decades (1-9, 10-19, ..., 40-49)",
+}
+
+
+def feature_columns(matrix: np.ndarray) -> Dict[str, np.ndarray]:
+    """(N, 6) sorted draws -> {feature: (N,) int16 column}"""
+    m = np.asarray(matrix, dtype=np.int16).reshape(-1, 6)
+    diffs = np.diff(m, axis=1)
+    decades = m // 10
+    columns = {
+        "sum": m.sum(axis=1),
+        "even": (m % 2 == 0).sum(axis=1),
+        "low": (m <= LOW_MAX).sum(axis=1),
+        "min": m[:, 0],
+        "max": m[:, 5],
+        "max_gap": diffs.max(axis=1),
+        "consecutive": (diffs == 1).sum(axis=1),
+        # Sorted draws - a new decade starts wherever the decade changes
+        "decades": 1 + (np.diff(decades, axis=1) > 0).sum(axis=1),
+    }
+    columns["odd"] = 6 - columns["even"]
+    columns["high"] = 6 - columns["low"]
+    columns["range"] = columns["max"] - columns["min"]
+    return {name: columns[name].astype(np.int16) for name in FEATURES}
+
+
+def concat_columns(a: Dict[str, np.ndarray], b: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Columns of a followed by columns of b (new arrays)"""
+    return {name: np.concatenate([a[name], b[name]]) for name in FEATURES}
+
+
+def feature_mask(
+    columns: Dict[str, np.ndarray],
+    name: str,
+    min_value: Optional[int] = None,
+    max_value: Optional[int] = None,
+    eq: Optional[int] = None
+) -> np.ndarray:
+    """Boolean mask of draws with min_value <= feature <= max_value (and == eq)"""
+    col = columns[name]
+    mask = np.ones(len(col), dtype=bool)
+    if min_value is not None:
+        mask &= col >= min_value
+    if max_value is not None:
+        mask &= col <= max_value
+    if eq is not None:
+        mask &= col == eq
+    return mask
+
+
+def distribution(values: np.ndarray) -> dict:
+    """Compact histogram: counts[i] = draws with value == start + i"""
+    if not len(values):
+        return {"start": 0, "counts": []}
+    start = int(values.min())
+    return {"start": start, "counts": np.bincount(values - start).tolist()}
+
+
+_cached_distributions = VersionedLRU(MAX_CACHED_DISTRIBUTIONS)
+
+
+def window_distributions(history, start: int, end: int) -> dict:
+    """
+    Histograms of DISTRIBUTION_FEATURES over draws [start, end) of a
+    history snapshot, plus per-decade number counts; cached per data version
+    """
+    cached = _cached_distributions.get(history.version, (start, end))
+    if cached is not None:
+        return cached
+
+    freq = history.window_freq(start, end)
+    result = {
+        "total_draws": end - start,
+        "distributions": {
+            name: distribution(history.features[name][start:end]) for name in DISTRIBUTION_FEATURES
+        },
+        # Numbers drawn per decade: 1-9, 10-19, 20-29, 30-39, 40-49
+        "decade_numbers": np.bincount(np.arange(1, 50) // 10, weights=freq, minlength=5).astype(int).tolist(),
+    }
+
+    _cached_distributions.put(history.version, (start, end), result)
+    return result
@@ -0,0 +1,153 @@
+"""
+Randomness / uniformity tests over draw history (GetLos_T)
+All tests run vectorized on the history snapshot (draw matrix, prefix
+counts, pair matrix); results are cached per data version and window
+"""
+import numpy as np
+from scipy import stats
+
+from combinatorics import PAIRS_TOTAL, pair_counts_by_rank
+from version_cache import VersionedLRU
+
+P_NUMBER = 6 / 49  # probability a number is drawn
+P_PAIR = 6 * 5 / (49 * 48)  # probability a pair is drawn
+SERIAL_LAGS = (1, 2, 3, 4, 5)
+SIGNIFICANCE = 0.05
+
+MAX_CACHED_RESULTS = 16
+
+
+def _p(value: float) -> float:
+    return round(float(value), 6)
+
+
+def frequency_test(freq: np.ndarray, total_draws: int) -> dict:
+    """
+    Chi-square uniformity of number frequencies (48 df)
+    Scaled by 48/43: numbers of one draw are drawn without replacement
+    """
+    expected = total_draws * P_NUMBER
+    statistic = float(((freq - expected) ** 2).sum() / expected * 48 / 43)
+    return {
+        "statistic": round(statistic, 4),
+        "df": 48,
+        "p_value": _p(stats.chi2.sf(statistic, 48)),
+        "expected": round(expected, 2),
+    }
+
+
+def _runs_z(flags: np.ndarray) -> np.ndarray:
+    """Wald-Wolfowitz runs test z-scores for every column of a (N, k) 0/1 matrix"""
+    n = len(flags)
+    n1 = flags.sum(axis=0).astype(np.float64)
+    n0 = n - n1
+    runs = 1 + (flags[1:] != flags[:-1]).sum(axis=0)
+    mean = 1 + 2 * n1 * n0 / n
+    var = 2 * n1 * n0 * (2 * n1 * n0 - n) / (n * n * (n - 1))
+    return np.divide(runs - mean, np.sqrt(var), out=np.zeros_like(mean), where=var > 0)
+
+
+def runs_test(matrix: np.ndarray, onehot: np.ndarray) -> dict:
+    """
+    Runs tests: draw sum above/below median, and per-number
+    drawn/not drawn sequences (all 49 in one pass)
+    """
+    sums = matrix.sum(axis=1)
+    above = (sums > np.median(sums)).astype(np.int8)[:, None]
+    sum_z = float(_runs_z(above)[0])
+    number_z = _runs_z(onehot)
+    number_p = 2 * stats.norm.sf(np.abs(number_z))
+    return {
+        "sum_median": {"z": round(sum_z, 4), "p_value": _p(2 * stats.norm.sf(abs(sum_z)))},
+        "numbers": {
+            "z": np.round(number_z, 3).tolist(),
+            "significant": [int(i) + 1 for i in np.flatnonzero(number_p < SIGNIFICANCE)],
+            # Bonferroni-corrected minimum over 49 tests
+            "min_p_value": _p(min(1.0, number_p.min() * 49)),
+        },
+    }
+
+
+def pair_test(pair_matrix: np.ndarray, total_draws: int) -> dict:
+    """
+    Chi-square of pair co-occurrence counts against independence
+    (approximate - pairs of one draw are not independent)
+    """
+    counts = pair_counts_by_rank(pair_matrix).astype(np.float64)
+    expected = total_draws * P_PAIR
+    z = (counts - expected) / np.sqrt(expected * (1 - P_PAIR))
+    statistic = float((z ** 2).sum())
+    df = PAIRS_TOTAL - 1
+    upper = np.triu(pair_matrix, k=1)
+    a, b = np.unravel_index(np.argmax(upper), upper.shape)
+    return {
+        "statistic": round(statistic, 4),
+        "df": df,
+        "p_value": _p(stats.chi2.sf(statistic, df)),
+        "expected": round(expected, 2),
+        "max_z": round(float(np.abs(z).max()), 3),
+        "most_frequent_pair": {"numbers": [int(a) + 1, int(b) + 1], "count": int(upper[a, b])},
+    }
+
+
+def serial_test(matrix: np.ndarray, onehot: np.ndarray) -> dict:
+    """
+    Serial correlation: autocorrelation of draw sums at SERIAL_LAGS and
+    numbers shared by consecutive draws vs hypergeometric expectation
+    """
+    n = len(matrix)
+    sums = matrix.sum(axis=1).astype(np.float64)
+    centered = sums - sums.mean()
+    denom = (centered ** 2).sum()
+    autocorr = []
+    for lag in SERIAL_LAGS:
+        r = float((centered[:-lag] * centered[lag:]).sum() / denom) if denom and n > lag else 0.0
+        z = r * np.sqrt(n)
+        autocorr.append({"lag": lag, "r": round(r, 5), "p_value": _p(2 * stats.norm.sf(abs(z)))})
+
+    shared = (onehot[:-1] & onehot[1:]).sum(axis=1)
+    # Hypergeometric: 6 of 49, 6 drawn
+    mean, var = 36 / 49, 6 * (6 / 49) * (43 / 49) * (43 / 48)
+    z = (shared.mean() - mean) / np.sqrt(var / len(shared))
+    return {
+        "sum_autocorrelation": autocorr,
+        "consecutive_overlap": {
+            "mean": round(float(shared.mean()), 4),
+            "expected": round(mean, 4),
+            "distribution": np.bincount(shared, minlength=7).tolist(),
+            "z": round(float(z), 4),
+            "p_value": _p(2 * stats.norm.sf(abs(z))),
+        },
+    }
+
+
+_cached_results = VersionedLRU(MAX_CACHED_RESULTS)
+
+
+def randomness_tests(history, start: int, end: int) -> dict:
+    """Run all tests on draws [start, end) of a history snapshot (cached per version)"""
+    cached = _cached_results.get(history.version, (start, end))
+    if cached is not None:
+        return cached
+
+    total = end - start
+    if total < 2:
+        return {"total_draws": total, "tests": {}}
+
+    matrix = history.matrix[start:end]
+    onehot = np.zeros((total, 49), dtype=np.int8)
+    np.put_along_axis(onehot, matrix - 1, 1, axis=1)
+    pair_matrix, _ = history.window_combo_counts(start, end)
+
+    result = {
+        "total_draws": total,
+        "tests": {
+            "frequency": frequency_test(history.window_freq(start, end), total),
+            "runs": runs_test(matrix, onehot),
+            "pairs": pair_test(pair_matrix, total),
+            "serial": serial_test(matrix, onehot),
+        },
+    }
+
+    _cached_results.put(history.version, (start, end), result)
+    return result
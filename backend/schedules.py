@@ -0,0 +1,154 @@
+"""
+Draw schedules for GetLos_T
+- ScheduleIndex: sorted schedule intervals with bisect lookup and a
+  vectorized expected-draw calendar (in memory, loaded once)
+- expected_draw_dates table: the calendar materialized from the index,
+  anti-joined with historical_draws to list missing dates
+Both are refreshed by on_schedules_changed()
+"""
+import threading
+from bisect import bisect_right
+from datetime import date, timedelta
+from typing import List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import DrawSchedule, ExpectedDrawDate, HistoricalDraw
+
+# Used when no schedule is configured: Tue, Thu, Sat
+DEFAULT_WEEKDAYS = [1, 3, 5]
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MAX_DATE_KEY = "9999-12-31"
+
+# Calendar starts at the first schedule (or the first Lotto draw without
+# schedules) and reaches this many days past today
+CALENDAR_START = "1957-01-27"
+CALENDAR_HORIZON_DAYS = 366
+
+
+class ScheduleIndex:
+    """Schedules sorted by date_from (no end date = ongoing)"""
+
+    def __init__(self, schedules: Sequence[DrawSchedule]):
+        schedules = sorted(schedules, key=lambda s: s.date_from)
+        self.ids = [s.id for s in schedules]
+        self.date_from = [s.date_from for s in schedules]
+        self.date_to = [s.date_to for s in schedules]
+        self.weekdays = [sorted(s.weekdays) for s in schedules]
+        # (S, 7) table: schedule -> is weekday a draw day
+        self.weekday_table = np.zeros((max(len(schedules), 1), 7), dtype=bool)
+        for i, days in enumerate(self.weekdays or [DEFAULT_WEEKDAYS]):
+            self.weekday_table[i, days] = True
+
+    def context_for(self, date_str: str) -> Optional[str]:
+        """Description of the closed schedule period containing the date"""
+        i = bisect_right(self.date_from, date_str) - 1
+        if i < 0 or self.date_to[i] is None or date_str > self.date_to[i]:
+            return None
+        names = ", ".join(WEEKDAY_NAMES[wd][:3] for wd in self.weekdays[i])
+        return f"Period {self.date_from[i]}-{self.date_to[i]}: scheduled {names}"
+
+    def calendar(self, date_from: date, date_to: date) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Expected draw days in [date_from, date_to]:
+        (days as datetime64[D], their weekdays, schedule positions)
+        """
+        days = np.arange(np.datetime64(date_from, "D"), np.datetime64(date_to, "D") + 1)
+        weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+        if not self.date_from:
+            idx = np.zeros(len(days), dtype=np.int64)
+        else:
+            starts = np.array(self.date_from, dtype="datetime64[D]")
+            ends = np.array([d or MAX_DATE_KEY for d in self.date_to], dtype="datetime64[D]")
+            idx = np.searchsorted(starts, days, side="right") - 1
+            inside = (idx >= 0) & (days <= ends[np.maximum(idx, 0)])
+            idx = np.where(inside, idx, np.where(idx < 0, 0, len(starts) - 1))
+        expected = self.weekday_table[idx, weekday]
+        return days[expected], weekday[expected], idx[expected]
+
+
+_index_lock = threading.Lock()
+_index: Optional[ScheduleIndex] = None
+
+
+def get_schedule_index(db: Session) -> ScheduleIndex:
+    """Return the schedule index, loading it on first use"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ScheduleIndex(db.query(DrawSchedule).all())
+        return _index
+
+
+def invalidate_schedule_index():
+    """Drop the index after draw_schedules changed (reloaded on next use)"""
+    global _index
+    with _index_lock:
+        _index = None
+
+
+# ========== Materialized calendar (expected_draw_dates) ==========
+
+def _calendar_bounds(index: ScheduleIndex) -> tuple[date, date]:
+    start = min(index.date_from) if index.date_from else CALENDAR_START
+    return date.fromisoformat(start), date.today() + timedelta(days=CALENDAR_HORIZON_DAYS)
+
+
+def rebuild_expected_dates(db: Session) -> int:
+    """Regenerate expected_draw_dates from draw_schedules (does not commit)"""
+    db.flush()  # pending schedule changes must be visible (autoflush is off)
+    index = ScheduleIndex(db.query(DrawSchedule).all())
+    days, weekdays, positions = index.calendar(*_calendar_bounds(index))
+    schedule_ids = [index.ids[p] for p in positions.tolist()] if index.ids else [None] * len(days)
+
+    db.query(ExpectedDrawDate).delete(synchronize_session=False)
+    db.bulk_insert_mappings(ExpectedDrawDate, [
+        {"draw_date": str(d), "weekday": int(wd), "schedule_id": sid}
+        for d, wd, sid in zip(days.astype(object).tolist(), weekdays.tolist(), schedule_ids)
+    ])
+    return len(days)
+
+
+def ensure_expected_dates(db: Session) -> bool:
+    """
+    Build the calendar if missing or ending before the horizon - True if rebuilt
+    Called at startup and on every calendar read, so a long-running server
+    extends it without a restart (the caller's commit persists it)
+    """
+    last = db.query(func.max(ExpectedDrawDate.draw_date)).scalar()
+    if last is None or last < str(date.today() + timedelta(days=CALENDAR_HORIZON_DAYS // 2)):
+        rebuild_expected_dates(db)
+        return True
+    return False
+
+
+def on_schedules_changed(db: Session):
+    """Refresh index and calendar after draw_schedules changed (caller commits)"""
+    invalidate_schedule_index()
+    rebuild_expected_dates(db)
+
+
+def expected_draw_dates(db: Session, date_from: date, date_to: date) -> List[date]:
+    """Expected draw dates in [date_from, date_to] from the materialized calendar"""
+    ensure_expected_dates(db)
+    rows = db.query(ExpectedDrawDate.draw_date).filter(
+        ExpectedDrawDate.draw_date.between(str(date_from), str(date_to))
+    ).order_by(ExpectedDrawDate.draw_date).all()
+    return [date.fromisoformat(r.draw_date) for r in rows]
+
+
+def missing_draw_dates(db: Session, date_from: date, date_to: date) -> List[date]:
+    """
+    Expected draw dates in [date_from, date_to] without a draw
+    SQL anti-join of expected_draw_dates with historical_draws (source = date)
+    """
+    ensure_expected_dates(db)
+    rows = db.query(ExpectedDrawDate.draw_date).outerjoin(
+        HistoricalDraw, HistoricalDraw.source == ExpectedDrawDate.draw_date
+    ).filter(
+        ExpectedDrawDate.draw_date.between(str(date_from), str(date_to)),
+        HistoricalDraw.id.is_(None)
+    ).order_by(ExpectedDrawDate.draw_date).all()
+    return [date.fromisoformat(r.draw_date) for r in rows]
@@ -2,8 +2,8 @@
 Pydantic schemas for request/response validation
 """
 from pydantic import BaseModel, Field, field_validator, field_serializer
-from typing import Literal, List, Optional
-from datetime import datetime
+from typing import Literal, List, Optional, Dict
+from datetime import datetime, date
 
 
 class Numbers(BaseModel):
@@ -33,6 +33,7 @@ class Stats(BaseModel):
     min_sum: int
     max_sum: int
     avg_sum: float
+    sum_std: Optional[float] = None  # standard deviation of draw sums
     most_frequent: List[tuple[int, int]]  # [(number, count), ...]
     least_frequent: List[tuple[int, int]]
 
@@ -75,6 +76,93 @@ class PaginatedDrawsResponse(BaseModel):
     total_pages: int
 
 
+class DistributionsResponse(BaseModel):
+    """Histograms of per-draw features (see patterns.DISTRIBUTION_FEATURES)"""
+    total_draws: int
+    distributions: Dict[str, dict]  # feature -> {"start", "counts"}, counts[i] = draws with value start + i
+    decade_numbers: List[int]  # numbers drawn in 1-9, 10-19, 20-29, 30-39, 40-49
+
+
+class TrendsResponse(BaseModel):
+    """Rolling-window frequency series (downsampled)"""
+    window: int  # draws per rolling window
+    points: int
+    dates: List[Optional[str]]  # date of the last draw of every point
+    sequential_ids: List[Optional[int]]
+    numbers: List[int]
+    series: List[List[float]]  # series[i][j] = draws with numbers[i] in the window ending at point j
+
+
+class RandomnessTestsResponse(BaseModel):
+    """Results of randomness tests (frequency, runs, pairs, serial)"""
+    total_draws: int
+    tests: Dict[str, dict]  # test name -> statistic, p_value, details
+
+
+class SimilarDrawsRequest(BaseModel):
+    """Tickets to compare against history"""
+    tickets: List[List[int]] = Field(..., min_length=1, max_length=1000)
+    top_k: int = Field(default=5, ge=1, le=100)
+    min_overlap: int = Field(default=0, ge=0, le=6)  # skip matches sharing fewer numbers
+    
+    @field_validator("tickets")
+    @classmethod
+    def validate_tickets(cls, v):
+        for ticket in v:
+            if len(ticket) != 6 or len(set(ticket)) != 6:
+                raise ValueError("Each ticket must have 6 unique numbers")
+            if any(n < 1 or n > 49 for n in ticket):
+                raise ValueError("All numbers must be in range 1-49")
+        return [sorted(t) for t in v]
+
+
+class SimilarDraw(BaseModel):
+    id: int
+    numbers: List[int]
+    source: Optional[str] = None
+    sequential_id: Optional[int] = None
+    overlap: int  # numbers shared with the ticket
+
+
+class TicketSimilarity(BaseModel):
+    """Most similar historical draws of one ticket"""
+    numbers: List[int]
+    best_overlap: int
+    overlap_counts: List[int]  # [k] = draws sharing exactly k numbers (0-6)
+    matches: List[SimilarDraw]  # most numbers shared first, then most recent
+
+
+class NumberGap(BaseModel):
+    """Gap (overdue) statistics of a single number"""
+    number: int
+    appearances: int
+    last_seen_sequential_id: Optional[int] = None
+    last_seen_date: Optional[str] = None
+    current_gap: int  # draws since last appearance
+    max_gap: int  # longest gap including the current one
+    avg_gap: float
+    std_gap: float
+    overdue_ratio: float  # (current_gap + 1) / (avg_gap + 1)
+
+
+class GapsResponse(BaseModel):
+    """Gap statistics of all numbers"""
+    total_draws: int
+    numbers: List[NumberGap]  # index 0 = number 1
+
+
+class SubsetQueryResponse(BaseModel):
+    """Draws containing all numbers of a subset (most recent first)"""
+    numbers: List[int]
+    count: int  # draws containing the subset
+    total_draws: int
+    ids: Optional[List[int]] = None  # page of draw ids (include=ids)
+    items: Optional[List[DrawResponse]] = None  # page of draws (include=draws)
+    page: int
+    per_page: int
+    total_pages: int
+
+
 class PickResponse(BaseModel):
     """Response for single pick"""
     id: int
@@ -87,12 +175,131 @@ class PickResponse(BaseModel):
         from_attributes = True
 
 
-class GenerateRequest(BaseModel):
-    """Request to generate new pick"""
-    strategy: Literal["random", "hot", "cold", "balanced", "combo_based", "ai"] = "random"
+class DrawWindow(BaseModel):
+    """Window of historical draws (all fields optional = whole history)"""
+    last_n: Optional[int] = Field(default=None, ge=1)  # newest N draws (of the date window)
+    date_from: Optional[date] = None  # inclusive
+    date_to: Optional[date] = None  # inclusive ("as of" date)
+    
+    @property
+    def is_full(self) -> bool:
+        return self.last_n is None and self.date_from is None and self.date_to is None
+    
+    def bounds(self) -> dict:
+        """Keyword arguments for DrawHistory.window / get_strategy_context"""
+        return {
+            "last_n": self.last_n,
+            "date_from": self.date_from.isoformat() if self.date_from else None,
+            "date_to": self.date_to.isoformat() if self.date_to else None,
+        }
+
+
+class GenerateRequest(DrawWindow):
+    """Request to generate new pick (optionally using only a window of history)"""
+    strategy: str = "random"  # name of a registered strategy (see GET /strategies)
     count: int = Field(default=1, ge=1, le=10)
 
 
+class FeatureRange(BaseModel):
+    """Predicate on a per-draw feature: min <= value <= max, value == eq"""
+    min: Optional[int] = None
+    max: Optional[int] = None
+    eq: Optional[int] = None
+
+
+class PatternQueryRequest(DrawWindow):
+    """Filter draws by predicates (all must hold) within an optional window"""
+    features: Dict[str, FeatureRange] = {}  # e.g. {"sum": {"min": 100, "max": 150}, "even": {"eq": 3}}
+    numbers: List[int] = []  # draws must contain all these numbers
+    schedule_id: Optional[int] = None  # only draws within the schedule's period
+    include: Literal["count", "distribution", "draws"] = "count"
+    distribution_of: str = "sum"  # feature histogram for include=distribution
+    limit: int = Field(default=50, ge=1, le=1000)
+    offset: int = Field(default=0, ge=0)
+    
+    @field_validator("numbers")
+    @classmethod
+    def validate_numbers(cls, v):
+        if any(n < 1 or n > 49 for n in v):
+            raise ValueError("All numbers must be in range 1-49")
+        return sorted(set(v))
+
+
+class PatternQueryResponse(BaseModel):
+    """Result of a pattern query"""
+    count: int  # matching draws
+    total_draws: int  # draws in the window
+    distribution: Optional[dict] = None  # {"feature", "start", "counts"} - counts[i] = value start + i
+    items: Optional[List[DrawResponse]] = None  # page of matching draws, most recent first
+    page: int
+    per_page: int
+    total_pages: int
+
+
+class CoverageRequest(BaseModel):
+    """Request to design a coverage-optimized ticket set"""
+    count: int = Field(default=10, ge=1, le=5000)
+    pool: Optional[List[int]] = None  # explicit candidate numbers (1-49), default: all 49
+    pool_preset: Optional[Literal["hot", "cold", "balanced"]] = None  # hot/cold pools of the balanced strategy
+    
+    @field_validator("pool")
+    @classmethod
+    def validate_pool(cls, v):
+        if v is None:
+            return v
+        if any(n < 1 or n > 49 for n in v):
+            raise ValueError("All pool numbers must be in range 1-49")
+        if len(set(v)) != len(v):
+            raise ValueError("Pool numbers must be unique")
+        if len(v) < 6:
+            raise ValueError("Pool must contain at least 6 numbers")
+        return sorted(v)
+
+
+class CoverageResponse(BaseModel):
+    """Response with designed ticket set and its pair/triple coverage"""
+    success: bool
+    tickets: int
+    pool: List[int]
+    pairs_covered: int
+    pairs_total: int
+    pair_coverage_pct: float
+    triples_covered: int
+    triples_total: int
+    triple_coverage_pct: float
+    picks: List[PickResponse]
+
+
+class SystemBetRequest(BaseModel):
+    """Request to expand/evaluate a system ticket (7-12 numbers)"""
+    numbers: List[int] = Field(..., min_length=7, max_length=12)
+    store: bool = False  # store all lines as picks
+    top_n: int = Field(default=10, ge=0, le=924)
+    
+    @field_validator("numbers")
+    @classmethod
+    def validate_numbers(cls, v):
+        if any(n < 1 or n > 49 for n in v):
+            raise ValueError("All numbers must be in range 1-49")
+        if len(set(v)) != len(v):
+            raise ValueError("All numbers must be unique")
+        return sorted(v)
+
+
+class SystemBetResponse(BaseModel):
+    """Evaluation of a system ticket against history"""
+    success: bool
+    numbers: List[int]
+    lines: int
+    total_draws: int
+    tiers: dict  # {"3": count, "4": count, "5": count, "6": count} of (line, draw) hits
+    draws_with_hits: int
+    best_hit: int
+    top_lines: List[dict]
+    stored: int = 0
+    skipped: int = 0
+
+
 class UploadResponse(BaseModel):
     """Response after CSV upload"""
     success: bool
@@ -109,6 +316,7 @@ class SyncLottoResponse(BaseModel):
     latest_draw_date: Optional[str] = None
     message: str
     error: Optional[str] = None
+    failed_dates: List[str] = []  # draw dates the API could not be queried for
 
 
 class ManualDrawRequest(BaseModel):
@@ -176,6 +384,9 @@ class IntegrityReport(BaseModel):
     api_reliable_start_date: Optional[str] = None
     api_reliable_start_sequential_id: Optional[int] = None
     historical_era_draws_count: Optional[int] = None
+    # "full" or "incremental" (only draws added since last verification)
+    scan: Optional[str] = None
+    inspected_draws: Optional[int] = None
 
 
 class IntegrityFixResponse(BaseModel):
@@ -185,6 +396,25 @@ class IntegrityFixResponse(BaseModel):
     gaps_filled: int
     sequential_ids_fixed: int
     message: str
+    gaps_failed: int = 0  # missing dates the API could not be queried for
+    error: Optional[str] = None
+
+
+class ApiCacheEndpointStats(BaseModel):
+    hits: int
+    misses: int
+
+
+class ApiCacheStats(BaseModel):
+    """Lotto.pl API response cache (hit/miss counters since start)"""
+    enabled: bool
+    entries: int
+    negative_entries: int  # cached "no draw" answers
+    expired_entries: int
+    hits: int
+    misses: int
+    hit_rate: Optional[float] = None
+    endpoints: Dict[str, ApiCacheEndpointStats]
 
 
 class DrawScheduleCreate(BaseModel):
@@ -221,5 +451,5 @@ class DrawScheduleResponse(BaseModel):
         from_attributes = True
 
 
-# Strategy type
-Strategy = Literal["random", "hot", "cold", "balanced", "combo_based", "ai"]
+# Strategy type - names come from the strategy registry (strategies.STRATEGIES)
+Strategy = str
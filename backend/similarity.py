@@ -0,0 +1,89 @@
+"""
+Nearest historical draws for tickets (GetLos_T)
+Overlap of a ticket with a draw = numbers they share, i.e. the popcount of
+(ticket_mask & draw_mask); computed for a batch of tickets at once as a
+product of 0/1 number matrices
+"""
+from typing import List
+
+import numpy as np
+
+# Tickets scored at once - bounds the (chunk, N) overlap matrix
+TICKET_CHUNK = 256
+
+
+def _onehot(rows: np.ndarray) -> np.ndarray:
+    onehot = np.zeros((len(rows), 49), dtype=np.float32)
+    if len(rows):
+        np.put_along_axis(onehot, np.asarray(rows) - 1, 1, axis=1)
+    return onehot
+
+
+def overlap_matrix(tickets: np.ndarray, draws_onehot: np.ndarray) -> np.ndarray:
+    """(T, 6) tickets x (N, 49) draws -> (T, N) uint8 numbers shared"""
+    return (_onehot(tickets) @ draws_onehot.T).astype(np.uint8)
+
+
+def overlap_buckets(overlaps: np.ndarray) -> np.ndarray:
+    """(T, 7) counts of draws sharing exactly 0-6 numbers with every ticket"""
+    counts = np.zeros((len(overlaps), 7), dtype=np.int64)
+    for v in range(1, 7):
+        counts[:, v] = np.count_nonzero(overlaps == v, axis=1)
+    counts[:, 0] = overlaps.shape[1] - counts[:, 1:].sum(axis=1)
+    return counts
+
+
+def top_positions(overlaps: np.ndarray, buckets: np.ndarray, k: int) -> List[np.ndarray]:
+    """
+    Positions of the k best draws per ticket (most numbers shared, then
+    most recent). Only draws at or above the lowest overlap level needed
+    for k results (from the buckets) are sorted
+    """
+    total = overlaps.shape[1]
+    at_least = np.cumsum(buckets[:, ::-1], axis=1)[:, ::-1]  # [:, v] = draws sharing >= v
+    level = np.maximum((at_least >= k).sum(axis=1) - 1, 0).astype(np.uint8)
+
+    rows, cols = np.nonzero(overlaps >= level[:, None])
+    score = overlaps[rows, cols].astype(np.int64) * total + cols
+    order = np.lexsort((-score, rows))
+    rows, cols = rows[order], cols[order]
+    starts = np.searchsorted(rows, np.arange(len(overlaps) + 1))
+    return [cols[starts[t]:min(starts[t] + k, starts[t + 1])] for t in range(len(overlaps))]
+
+
+def similar_draws(history, tickets: List[List[int]], top_k: int, min_overlap: int = 0) -> List[dict]:
+    """
+    For every ticket: draws with the largest overlap (ties -> most recent
+    first) and overlap_counts[k] = number of draws sharing exactly k numbers
+    """
+    draws_onehot = _onehot(history.matrix)
+    k = min(top_k, len(history))
+    results = []
+
+    for start in range(0, len(tickets), TICKET_CHUNK):
+        chunk = tickets[start:start + TICKET_CHUNK]
+        overlaps = overlap_matrix(np.asarray(chunk), draws_onehot)
+        buckets = overlap_buckets(overlaps)
+        top = top_positions(overlaps, buckets, k) if k else [[] for _ in chunk]
+
+        for t, ticket in enumerate(chunk):
+            matches = []
+            for p in top[t]:
+                overlap = int(overlaps[t, p])
+                if overlap < min_overlap:
+                    break
+                matches.append({
+                    "id": history.ids[p],
+                    "numbers": history.rows[p],
+                    "source": history.sources[p],
+                    "sequential_id": history.sequential_ids[p],
+                    "overlap": overlap,
+                })
+            nonzero = np.flatnonzero(buckets[t])
+            results.append({
+                "numbers": ticket,
+                "best_overlap": int(nonzero[-1]) if len(nonzero) else 0,
+                "overlap_counts": buckets[t].tolist(),
+                "matches": matches,
+            })
+    return results
@@ -0,0 +1,448 @@
+"""
+Pick generation strategies for GetLos_T
+
+Strategies are registered in STRATEGIES. Each declares the context inputs
+it reads (which also orders warmup), precomputes its state once per data
+version and samples picks in batches. Adding a strategy = one decorated
+class, nothing else.
+"""
+import random
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter
+from functools import cached_property
+from typing import Dict, List, Optional
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sqlalchemy.orm import Session
+
+import markov
+from combinatorics import PAIR_NUMBERS, TRIPLE_NUMBERS, pair_counts_by_rank, top_k_ranks
+from gaps import GapStats
+from history import DrawHistory, get_history
+from version_cache import VersionedLRU
+
+UNIVERSE = list(range(1, 50))
+
+# Context inputs (see StrategyContext), cheapest to build first
+CONTEXT_INPUTS = ("frequencies", "transitions", "gaps", "pair_tensor", "model")
+
+
+def hot_cold_pools(freq: List[int], size: int = 13) -> tuple[List[int], List[int]]:
+    """
+    Return (hot_pool, cold_pool) - the `size` most and least frequent numbers
+    Used by balanced strategy and coverage designer
+    """
+    idx_sorted = sorted(range(49), key=lambda i: freq[i], reverse=True)
+    hot_pool = [i + 1 for i in idx_sorted[:size]]
+    cold_pool = [i + 1 for i in idx_sorted[-size:]]
+    return hot_pool, cold_pool
+
+
+def get_top_pairs_triples(pair_matrix: np.ndarray, triple_counts: np.ndarray, top_n: int = 30):
+    """
+    Return most frequent pairs and triples (as sets of numbers)
+    Used for combo_based strategy
+    """
+    top_pairs = [set(PAIR_NUMBERS[r].tolist()) for r in top_k_ranks(pair_counts_by_rank(pair_matrix), top_n)]
+    top_triples = [set(TRIPLE_NUMBERS[r].tolist()) for r in top_k_ranks(triple_counts, top_n)]
+
+    return top_pairs, top_triples
+
+
+def _draw_features(draw: List[int], freq: List[int]) -> List[int]:
+    """Features of a single draw used by the AI strategy"""
+    feature_vec = [
+        sum(draw),  # Sum of numbers
+        len([n for n in draw if n % 2 == 0]),  # Even count
+        max(draw) - min(draw),  # Range
+        freq[draw[0] - 1],  # Freq of first number
+        freq[draw[-1] - 1],  # Freq of last number
+    ]
+    # Add gap features (differences between consecutive numbers)
+    gaps = [draw[j+1] - draw[j] for j in range(len(draw)-1)]
+    feature_vec.extend(gaps + [0] * (5 - len(gaps)))  # Pad to 5 gaps
+    return feature_vec
+
+
+def ai_predictions(all_rows: List[List[int]], freq: List[int]) -> List[tuple[int, float]]:
+    """
+    Train one classifier per number on "features of draw -> numbers of the
+    next draw" and predict probabilities for the draw after the latest one
+    Returns [(number, probability), ...] sorted by probability (descending)
+    """
+    features = [_draw_features(current, freq) for current in all_rows[:-1]]
+    # Label: binary vector indicating which numbers appeared in the next draw
+    labels = [[1 if n in next_draw else 0 for n in range(1, 50)] for next_draw in all_rows[1:]]
+
+    X = np.array(features)
+    y = np.array(labels)
+    test_feature = _draw_features(all_rows[-1], freq)
+
+    predictions = []
+    for num_idx in range(49):
+        if len(np.unique(y[:, num_idx])) > 1:  # Only if we have both classes
+            clf = RandomForestClassifier(n_estimators=10, max_depth=5, random_state=42)
+            clf.fit(X, y[:, num_idx])
+            prob = clf.predict_proba([test_feature])[0][1]  # Probability of appearing
+        else:
+            prob = freq[num_idx] / (sum(freq) + 1)  # Fallback to frequency
+
+        predictions.append((num_idx + 1, float(prob)))
+
+    predictions.sort(key=lambda x: x[1], reverse=True)
+    return predictions
+
+
+class StrategyContext:
+    """
+    Inputs shared by all strategies, computed once per data version and window
+    Expensive inputs are computed lazily by the first strategy that needs them
+    
+    Window (positions [start, end) of the history) limits frequencies, pools,
+    combos and AI training data; Markov transitions always use full history.
+    
+    Inputs:
+    - frequencies: per-number counts, hot/cold weights, balanced pools
+    - pair_tensor: top pairs/triples
+    - gaps: per-number gap (overdue) statistics
+    - model: AI model predictions
+    - transitions: Markov transition weights for the latest draw
+    """
+
+    def __init__(
+        self,
+        history: DrawHistory,
+        transition_weights: Optional[np.ndarray] = None,
+        window: Optional[tuple[int, int]] = None
+    ):
+        self.version = history.version
+        self.window = window or (0, len(history))
+        start, end = self.window
+        self.rows = history.rows[start:end]
+        self.history = history
+        # Served from the prefix-sum index, no scan over draws
+        self.freq = history.window_freq(start, end).tolist()
+        self.transition_weights = transition_weights
+        self._states: Dict[str, object] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+
+    @property
+    def has_data(self) -> bool:
+        return sum(self.freq) > 0
+
+    @cached_property
+    def hot_weights(self) -> np.ndarray:
+        return np.maximum(np.asarray(self.freq, dtype=np.float64), 1)
+
+    @cached_property
+    def cold_weights(self) -> np.ndarray:
+        freq = np.asarray(self.freq, dtype=np.float64)
+        return np.maximum(freq.max() + 1 - freq, 1)
+
+    @cached_property
+    def pools(self) -> tuple[List[int], List[int]]:
+        return hot_cold_pools(self.freq)
+
+    @property
+    def hot_pool(self) -> List[int]:
+        return self.pools[0]
+
+    @property
+    def cold_pool(self) -> List[int]:
+        return self.pools[1]
+
+    @cached_property
+    def top_combos(self) -> tuple[list, list]:
+        """Top 30 pairs and triples"""
+        pair_matrix, triple_counts = self.history.window_combo_counts(*self.window)
+        return get_top_pairs_triples(pair_matrix, triple_counts, top_n=30)
+
+    @cached_property
+    def gaps(self) -> GapStats:
+        return self.history.window_gaps(*self.window)
+
+    @cached_property
+    def ai_predictions(self) -> List[tuple[int, float]]:
+        """Per-number probabilities from the AI model (trained once per version)"""
+        return ai_predictions(self.rows, self.freq)
+
+    def state_for(self, strategy: "PickStrategy"):
+        """Precomputed state of a strategy for this data version"""
+        if strategy.name not in self._states:
+            # Per-strategy lock: a slow precompute (AI) doesn't block other strategies
+            with self._locks.setdefault(strategy.name, threading.Lock()):
+                if strategy.name not in self._states:
+                    self._states[strategy.name] = strategy.precompute(self)
+        return self._states[strategy.name]
+
+    def is_warm(self, name: str) -> bool:
+        """True if strategy state is already precomputed for this data version"""
+        return name in self._states
+
+
+# ========== Registry ==========
+
+STRATEGIES: Dict[str, "PickStrategy"] = {}
+
+
+def register_strategy(cls):
+    """Class decorator adding a strategy to the registry"""
+    strategy = cls()
+    unknown = set(strategy.inputs) - set(CONTEXT_INPUTS)
+    if unknown:
+        raise ValueError(f"Strategy '{strategy.name}' declares unknown inputs: {', '.join(sorted(unknown))}")
+    STRATEGIES[strategy.name] = strategy
+    return cls
+
+
+class PickStrategy(ABC):
+    """
+    Base class for strategies
+    
+    name:     identifier used by /generate
+    inputs:   context inputs read by precompute (CONTEXT_INPUTS) - checked at
+              registration; strategies with cheaper inputs are warmed first
+    fallback: strategy used when precompute returns None (not enough data)
+    """
+    name: str = ""
+    description: str = ""
+    inputs: tuple = ()
+    fallback: Optional[str] = "random"
+
+    def precompute(self, ctx: StrategyContext):
+        """Build state for a data version - return None if the strategy can't run"""
+        return True
+
+    @abstractmethod
+    def sample(self, state, n: int) -> List[List[int]]:
+        """Generate n candidate picks (sorted 6-number lists)"""
+
+    def warmup(self, ctx: StrategyContext):
+        """Precompute state so the first request is as fast as the next ones"""
+        ctx.state_for(self)
+
+    @property
+    def warmup_cost(self) -> int:
+        """Rank of the most expensive declared input (-1 = none)"""
+        return max((CONTEXT_INPUTS.index(name) for name in self.inputs), default=-1)
+
+
+def _weighted_batch(weights: np.ndarray, n: int) -> List[List[int]]:
+    """
+    n picks of 6 distinct numbers, sampled without replacement proportionally
+    to weights (Gumbel top-k - same distribution as drawing one by one)
+    """
+    keys = np.log(weights)[None, :] + np.random.gumbel(size=(n, 49))
+    top = np.argpartition(-keys, 6, axis=1)[:, :6] + 1
+    return np.sort(top, axis=1).tolist()
+
+
+@register_strategy
+class RandomStrategy(PickStrategy):
+    name = "random"
+    description = "Pure random selection"
+    fallback = None
+
+    def sample(self, state, n):
+        return _weighted_batch(np.ones(49), n)
+
+
+@register_strategy
+class HotStrategy(PickStrategy):
+    name = "hot"
+    description = "Favor frequently drawn numbers"
+    inputs = ("frequencies",)
+
+    def precompute(self, ctx):
+        return ctx.hot_weights if ctx.has_data else None
+
+    def sample(self, state, n):
+        return _weighted_batch(state, n)
+
+
+@register_strategy
+class ColdStrategy(PickStrategy):
+    name = "cold"
+    description = "Favor rarely drawn numbers"
+    inputs = ("frequencies",)
+
+    def precompute(self, ctx):
+        return ctx.cold_weights if ctx.has_data else None
+
+    def sample(self, state, n):
+        return _weighted_batch(state, n)
+
+
+@register_strategy
+class BalancedStrategy(PickStrategy):
+    name = "balanced"
+    description = "Mix of hot (3) and cold (3) numbers"
+    inputs = ("frequencies",)
+
+    def precompute(self, ctx):
+        if not ctx.has_data:
+            return None
+        return np.array(ctx.hot_pool), np.array(ctx.cold_pool)
+
+    def sample(self, state, n):
+        hot_pool, cold_pool = state
+        hot = hot_pool[np.argsort(np.random.random((n, len(hot_pool))), axis=1)[:, :3]]
+        cold = cold_pool[np.argsort(np.random.random((n, len(cold_pool))), axis=1)[:, :3]]
+        return np.sort(np.hstack([hot, cold]), axis=1).tolist()
+
+
+@register_strategy
+class ComboBasedStrategy(PickStrategy):
+    name = "combo_based"
+    description = "Based on frequent pairs/triples"
+    inputs = ("pair_tensor",)
+
+    def precompute(self, ctx):
+        if not ctx.has_data:
+            return None
+        top_pairs, top_triples = ctx.top_combos
+        combo_weights = Counter()
+        for combo in top_pairs + top_triples:
+            for n in combo:
+                combo_weights[n] += 1
+        return np.array([combo_weights.get(n, 1) for n in UNIVERSE], dtype=np.float64)
+
+    def sample(self, state, n):
+        return _weighted_batch(state, n)
+
+
+@register_strategy
+class OverdueStrategy(PickStrategy):
+    name = "overdue"
+    description = "Favor numbers not drawn for longer than their average gap"
+    inputs = ("gaps",)
+
+    def precompute(self, ctx):
+        return ctx.gaps.overdue_ratio if ctx.has_data else None
+
+    def sample(self, state, n):
+        return _weighted_batch(state, n)
+
+
+@register_strategy
+class AIStrategy(PickStrategy):
+    name = "ai"
+    description = "Machine learning prediction based on patterns"
+    inputs = ("frequencies", "model")
+    fallback = "balanced"
+
+    def precompute(self, ctx):
+        if len(ctx.rows) < 20:
+            return None
+        return ctx.ai_predictions
+
+    def sample(self, state, n):
+        return [pick_with_ai(state) for _ in range(n)]
+
+
+@register_strategy
+class MarkovStrategy(PickStrategy):
+    name = "markov"
+    description = "Transition counts from the numbers of the latest draw"
+    inputs = ("transitions",)
+    fallback = "hot"
+
+    def precompute(self, ctx):
+        return ctx.transition_weights
+
+    def sample(self, state, n):
+        # +1 smoothing so every number is possible
+        return _weighted_batch(state + 1, n)
+
+
+def pick_with_ai(predictions: List[tuple[int, float]]) -> List[int]:
+    """
+    AI-based prediction using machine learning
+    Mixes the most probable numbers with weighted random medium ones
+    """
+    picks = set()
+
+    # Take top 3 most probable
+    for num, _ in predictions[:8]:
+        picks.add(num)
+        if len(picks) >= 3:
+            break
+
+    # Add 2-3 numbers from medium probability (weighted random)
+    mid_prob = predictions[8:25]
+    weights = [p[1] for p in mid_prob]
+    if sum(weights) > 0:
+        selected = np.random.choice(
+            [p[0] for p in mid_prob],
+            size=min(3, len(mid_prob)),
+            replace=False,
+            p=np.array(weights) / sum(weights)
+        )
+        # Convert numpy.int64 to Python int
+        picks.update([int(x) for x in selected])
+
+    # Fill remaining if needed
+    while len(picks) < 6:
+        remaining = [n for n in UNIVERSE if n not in picks]
+        picks.add(random.choice(remaining))
+
+    # Convert numpy.int64 to Python int (JSON serializable)
+    return [int(x) for x in sorted(list(picks)[:6])]
+
+
+def sample_strategy(ctx: StrategyContext, name: str, n: int) -> List[List[int]]:
+    """
+    Generate n candidate picks with a registered strategy
+    Follows fallback chain when a strategy has not enough data
+    """
+    strategy = STRATEGIES[name]
+    state = ctx.state_for(strategy)
+    while state is None and strategy.fallback:
+        strategy = STRATEGIES[strategy.fallback]
+        state = ctx.state_for(strategy)
+    return [[int(x) for x in pick] for pick in strategy.sample(state, n)]
+
+
+# ========== Context cache / warmup ==========
+
+# Contexts of the current data version keyed by window
+MAX_CACHED_CONTEXTS = 16
+
+_cached_contexts = VersionedLRU(MAX_CACHED_CONTEXTS)
+
+
+def get_strategy_context(
+    db: Session,
+    last_n: Optional[int] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None
+) -> StrategyContext:
+    """
+    Return cached strategy context for the current data version and window
+    (no window = whole history)
+    """
+    history = get_history(db)
+    window = history.window(last_n=last_n, date_from=date_from, date_to=date_to)
+    return _cached_contexts.get_or_create(
+        history.version, window,
+        lambda: StrategyContext(history, markov.transition_weights(db), window)
+    )
+
+
+def warmup_strategies(db: Session) -> List[str]:
+    """
+    Precompute state of every registered strategy for the current data
+    version - cheapest inputs first, so a slow model build doesn't keep
+    the other strategies cold
+    """
+    ctx = get_strategy_context(db)
+    warmed = []
+    for strategy in sorted(STRATEGIES.values(), key=lambda s: s.warmup_cost):
+        try:
+            strategy.warmup(ctx)
+            warmed.append(strategy.name)
+        except Exception as e:
+            print(f"[!] Warmup strategii {strategy.name} nie powiodl sie: {e}")
+    return warmed
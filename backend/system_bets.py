@@ -0,0 +1,81 @@
+"""
+System bets (7-12 numbers) for GetLos_T
+A system ticket of n numbers plays all C(n, 6) six-number combinations
+"""
+from functools import lru_cache
+from math import comb
+from typing import List, Sequence
+
+import numpy as np
+
+from combinatorics import subset_unrank, rows_to_masks, popcount64, numbers_to_mask
+
+MIN_SYSTEM_SIZE = 7
+MAX_SYSTEM_SIZE = 12
+
+# Prize tiers (number of hits in a single 6-number line)
+PRIZE_TIERS = (3, 4, 5, 6)
+
+
+@lru_cache(maxsize=None)
+def system_positions(size: int) -> np.ndarray:
+    """
+    (C(size, 6), 6) array of 0-based positions of every line of a system
+    Lines are produced by unranking colex ranks 0..C(size, 6)-1
+    """
+    total = comb(size, 6)
+    positions = np.array([subset_unrank(rank, 6) for rank in range(total)], dtype=np.int64) - 1
+    positions.setflags(write=False)
+    return positions
+
+
+def expand_system(numbers: Sequence[int]) -> List[List[int]]:
+    """Expand system ticket into all of its 6-number lines (sorted)"""
+    nums = np.array(sorted(numbers), dtype=np.int64)
+    return nums[system_positions(len(nums))].tolist()
+
+
+def evaluate_system(numbers: Sequence[int], history: Sequence[Sequence[int]], top_n: int = 10) -> dict:
+    """
+    Check every line of a system against historical draws
+    
+    Draws sharing fewer than 3 numbers with the whole system cannot produce
+    a prize in any line, so the line x draw popcount matrix is only built
+    for the remaining draws.
+    
+    Returns per-tier hit counts (line/draw pairs), number of draws with at
+    least one prize and best performing lines.
+    """
+    lines = expand_system(numbers)
+    line_masks = rows_to_masks(lines)
+    draw_masks = rows_to_masks(history)
+    
+    system_hits = popcount64(draw_masks & np.uint64(numbers_to_mask(numbers)))
+    candidate_masks = draw_masks[system_hits >= PRIZE_TIERS[0]]
+    
+    # (lines, candidate draws) hit matrix
+    hits = popcount64(line_masks[:, None] & candidate_masks[None, :])
+    
+    per_line = {tier: (hits == tier).sum(axis=1) for tier in PRIZE_TIERS}
+    tiers = {str(tier): int(per_line[tier].sum()) for tier in PRIZE_TIERS}
+    best_per_line = hits.max(axis=1) if hits.size else np.zeros(len(lines), dtype=np.uint8)
+    
+    # Best lines: highest hit first, then most prizes from the top tier down
+    order = np.lexsort([per_line[tier] for tier in PRIZE_TIERS] + [best_per_line])[::-1][:top_n]
+    top_lines = [
+        {
+            "numbers": lines[i],
+            "best_hit": int(best_per_line[i]),
+            "tiers": {str(tier): int(per_line[tier][i]) for tier in PRIZE_TIERS}
+        }
+        for i in order
+    ]
+    
+    return {
+        "lines": len(lines),
+        "total_draws": len(history),
+        "tiers": tiers,
+        "draws_with_hits": int((hits >= PRIZE_TIERS[0]).any(axis=0).sum()) if hits.size else 0,
+        "best_hit": int(best_per_line.max()) if len(lines) else 0,
+        "top_lines": top_lines,
+    }
@@ -37,6 +37,13 @@ def test_picks():
     print(f"✓ Picks endpoint: Found {len(result)} picks")
     return response.status_code == 200
 
+def test_verify_integrity():
+    """Test incremental integrity verification matches a full scan"""
+    incremental = requests.get(f"{BASE_URL}/verify-integrity").json()
+    full = requests.get(f"{BASE_URL}/verify-integrity", params={"full": "true"}).json()
+    print(f"✓ Verify integrity: {incremental['scan']} ({incremental['inspected_draws']} inspected) vs full: {full['summary']}")
+    return all(incremental[k] == full[k] for k in full if k not in ("scan", "inspected_draws"))
+
 def main():
     print("=" * 50)
     print("Testing GetLos_T Backend")
@@ -48,6 +55,7 @@ def main():
         ("Stats Endpoint", test_stats),
         ("Generate Endpoint", test_generate),
         ("Picks List", test_picks),
+        ("Verify Integrity", test_verify_integrity),
     ]
     
     passed = 0
@@ -0,0 +1,216 @@
+"""
+Test script for incrementally maintained analytics
+Imports the backup from data_backup/ into a temporary database except the
+newest draws, warms every cache, appends the rest in batches and compares
+each incrementally maintained structure with a rebuild from scratch
+Run: python test_incremental.py
+"""
+import json
+import os
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent
+_tmp_dir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_dir.name}/test.db"
+os.environ["LOTTO_API_CACHE"] = "0"
+os.chdir(BACKEND_DIR)
+
+from fastapi.testclient import TestClient
+
+import numpy as np
+from sqlalchemy import func
+
+import aggregates
+import history
+import integrity
+import markov
+from db import SessionLocal
+from gaps import GapStats
+from main import app, on_draws_added
+from models import HistoricalDraw, MarkovTransitions, norm_key
+
+BACKUP_DIR = BACKEND_DIR.parent / "data_backup"
+CONFIG_PATH = BACKEND_DIR / "config.yaml"  # rewritten by /verify-integrity, restored afterwards
+APPENDED = 120  # newest draws appended after warmup
+BATCH = 40
+
+history_reloads = []  # versions loaded from scratch while appending
+verify_scans = []  # /verify-integrity scan mode after every appended batch
+
+client = TestClient(app)
+
+
+def seed():
+    """Import all but the newest APPENDED draws, then append them in batches"""
+    backup = sorted(BACKUP_DIR.glob("lotto-backup-*.json"))[-1]
+    with open(backup, encoding="utf-8") as f:
+        draws = sorted(json.load(f)["draws"], key=lambda d: d["date"])
+
+    client.post("/import-draws", json={"draws": draws[:-APPENDED]})
+    client.get("/verify-integrity")
+    db = SessionLocal()
+    load_history = history._load_history
+    try:
+        history.get_history(db)
+        history._load_history = lambda db, version: history_reloads.append(version) or load_history(db, version)
+        for start in range(len(draws) - APPENDED, len(draws), BATCH):
+            client.post("/import-draws", json={"draws": draws[start:start + BATCH]})
+            history.get_history(db)
+            verify_scans.append(client.get("/verify-integrity").json()["scan"])
+    finally:
+        history._load_history = load_history
+        db.close()
+    print(f"  Seeded {len(draws)} draws from {backup.name} ({APPENDED} appended in batches of {BATCH})")
+
+
+def test_markov():
+    """Markov transitions updated per batch match rebuild_transitions"""
+    db = SessionLocal()
+    try:
+        state = db.query(MarkovTransitions).first()
+        incremental = (state.counts, state.last_numbers, state.last_source, state.draws_count)
+        rebuilt = markov.rebuild_transitions(db)
+        full = (rebuilt.counts, rebuilt.last_numbers, rebuilt.last_source, rebuilt.draws_count)
+        print(f"✓ Markov: {state.draws_count} draws, last {state.last_source}")
+        return incremental == full
+    finally:
+        db.rollback()
+        db.close()
+
+
+def test_aggregates():
+    """stats_aggregate updated per batch matches rebuild_aggregate"""
+    db = SessionLocal()
+    try:
+        fields = ("freq", "sum_hist", "sum_total", "sum_sq_total", "total_draws", "total_picks")
+        agg = aggregates.get_aggregate(db)
+        incremental = {name: getattr(agg, name) for name in fields}
+        print(f"✓ Aggregates: {agg.total_draws} draws, data version {agg.data_version}")
+        rebuilt = aggregates.rebuild_aggregate(db)
+        full = {name: getattr(rebuilt, name) for name in fields}
+        return incremental == full
+    finally:
+        db.rollback()
+        db.close()
+
+
+def test_history():
+    """Snapshot extended per batch matches a full reload"""
+    db = SessionLocal()
+    try:
+        cached = history.get_history(db)
+        full = history._load_history(db, cached.version)
+        lists_match = all(
+            getattr(cached, name) == getattr(full, name)
+            for name in ("rows", "ids", "sources", "date_keys", "sequential_ids", "keys")
+        )
+        arrays_match = all(
+            np.array_equal(getattr(cached, name), getattr(full, name))
+            for name in ("matrix", "cum_counts", "cum_sums", "pair_counts", "triple_counts", "number_bits")
+        )
+        features_match = cached.features.keys() == full.features.keys() and all(
+            np.array_equal(cached.features[name], full.features[name]) for name in full.features
+        )
+        print(f"✓ History: {len(cached)} draws, reloads while appending: {len(history_reloads)}")
+        return not history_reloads and lists_match and arrays_match and features_match
+    finally:
+        db.close()
+
+
+def test_gaps():
+    """Gap stats extended per batch match GapStats.from_matrix"""
+    db = SessionLocal()
+    try:
+        cached = history.get_history(db).gaps
+        full = GapStats.from_matrix(history.get_history(db).matrix)
+        print(f"✓ Gaps: {cached.draws} draws, longest gap {int(cached.max_gap.max())}")
+        return cached.draws == full.draws and all(
+            np.array_equal(getattr(cached, name), getattr(full, name))
+            for name in ("last_pos", "count", "gap_sum", "gap_sq", "max_gap")
+        )
+    finally:
+        db.close()
+
+
+def test_integrity():
+    """Incremental /verify-integrity matches a full scan"""
+    db = SessionLocal()
+    try:
+        state_checks = integrity.verify(db)[0]
+        db.rollback()
+        appended_match = state_checks == integrity.full_scan(db)
+    finally:
+        db.close()
+
+    # New draws sharing an already verified sequential_id, verified one at a time
+    scans = []
+    reports_match = True
+    for source, numbers in (("2026-02-03", [1, 2, 3, 4, 5, 49]), ("2026-02-05", [1, 2, 3, 4, 6, 49])):
+        db = SessionLocal()
+        try:
+            max_seq = db.query(func.max(HistoricalDraw.sequential_id)).scalar()
+            draw = HistoricalDraw(numbers=numbers, key=norm_key(numbers), source=source, sequential_id=max_seq)
+            db.add(draw)
+            on_draws_added(db, [draw])
+            db.commit()
+        finally:
+            db.close()
+        incremental = client.get("/verify-integrity").json()
+        full = client.get("/verify-integrity", params={"full": True}).json()
+        scans.append(incremental["scan"])
+        reports_match &= all(incremental[k] == full[k] for k in full if k not in ("scan", "inspected_draws"))
+
+    print(f"✓ Integrity: batch scans {verify_scans}, shared sequential_id scans {scans}: {incremental['summary']}")
+    return appended_match and set(verify_scans + scans) == {"incremental"} and reports_match
+
+
+def main():
+    print("=" * 50)
+    print("Testing incremental analytics")
+    print("=" * 50)
+    print()
+
+    tests = [
+        ("Markov Transitions", test_markov),
+        ("Stats Aggregates", test_aggregates),
+        ("Draw History", test_history),
+        ("Gap Stats", test_gaps),
+        ("Verify Integrity", test_integrity),
+    ]
+
+    passed = 0
+    failed = 0
+
+    config = CONFIG_PATH.read_text(encoding="utf-8")
+    try:
+        with client:
+            seed()
+            for name, test_func in tests:
+                print(f"\nTesting: {name}")
+                try:
+                    if test_func():
+                        print(f"✅ {name} PASSED")
+                        passed += 1
+                    else:
+                        print(f"❌ {name} FAILED")
+                        failed += 1
+                except Exception as e:
+                    print(f"❌ {name} FAILED with error: {e}")
+                    failed += 1
+    finally:
+        CONFIG_PATH.write_text(config, encoding="utf-8")
+
+    print()
+    print("=" * 50)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 50)
+
+    if failed == 0:
+        print("🎉 All tests passed!")
+    else:
+        print("⚠️ Some tests failed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Test script for the Lotto.pl client internals (no API key or network needed)
+Response cache TTL rules and the circuit breaker state machine, run against
+a temporary cache file with a fake clock
+Run: python test_lotto_client.py
+"""
+import asyncio
+import os
+import tempfile
+from datetime import date, timedelta
+
+_tmp_dir = tempfile.TemporaryDirectory()
+os.environ["LOTTO_API_CACHE"] = "1"
+os.environ["LOTTO_API_CACHE_PATH"] = os.path.join(_tmp_dir.name, "api_cache.db")
+
+import httpx
+
+import api_cache
+import lotto_api
+from lotto_api import BREAKER_COOLDOWN, BREAKER_MIN_REQUESTS, CircuitBreaker, LottoAPIUnavailableError
+
+
+class FakeClock:
+    """Stands in for the time module (time() and monotonic())"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+clock = FakeClock()
+api_cache.time = clock
+lotto_api.time = clock
+
+
+def test_draw_date_ttl():
+    """Published draws never expire, empty answers expire by recency"""
+    today = date.today()
+    cases = [
+        (today - timedelta(days=400), [{"drawSystemId": 1}], None),
+        (today, [{"drawSystemId": 2}], None),
+        (today, [], api_cache.RECENT_NEGATIVE_TTL),
+        (today - timedelta(days=1), [], api_cache.RECENT_NEGATIVE_TTL),
+        (today - timedelta(days=2), [], api_cache.NEGATIVE_TTL),
+    ]
+    results = [api_cache.draw_date_ttl(draw_date, body) == ttl for draw_date, body, ttl in cases]
+    print(f"✓ draw_date_ttl: {sum(results)}/{len(results)} cases")
+    return all(results)
+
+
+def test_cache_expiry():
+    """Entries are served until expires_at; ttl None never expires"""
+    api_cache.put("by-date", {"drawDate": "2024-01-02"}, [{"drawSystemId": 1}], None)
+    api_cache.put("by-date", {"drawDate": "2024-01-03"}, [], api_cache.NEGATIVE_TTL)
+    api_cache.put("last-results", {"gameType": "Lotto"}, [{"drawSystemId": 2}], api_cache.LATEST_TTL)
+
+    fresh = [
+        api_cache.get("by-date", {"drawDate": "2024-01-02"}) == [{"drawSystemId": 1}],
+        api_cache.get("by-date", {"drawDate": "2024-01-03"}) == [],
+        api_cache.get("last-results", {"gameType": "Lotto"}) == [{"drawSystemId": 2}],
+    ]
+    clock.advance(api_cache.LATEST_TTL + 1)
+    latest_expired = api_cache.get("last-results", {"gameType": "Lotto"}) is None
+    negative_kept = api_cache.get("by-date", {"drawDate": "2024-01-03"}) == []
+    clock.advance(api_cache.NEGATIVE_TTL)
+    negative_expired = api_cache.get("by-date", {"drawDate": "2024-01-03"}) is None
+    published_kept = api_cache.get("by-date", {"drawDate": "2024-01-02"}) == [{"drawSystemId": 1}]
+    missing = api_cache.get("by-date", {"drawDate": "2024-01-04"}) is None
+
+    print(f"✓ Cache expiry: fresh {fresh}, latest expired {latest_expired}, "
+          f"negative expired {negative_expired}, published kept {published_kept}")
+    return all(fresh) and latest_expired and negative_kept and negative_expired and published_kept and missing
+
+
+def test_cache_stats():
+    """Stats count hits/misses per endpoint and negative/expired entries"""
+    stats = api_cache.stats()
+    by_date = stats["endpoints"].get("by-date", {})
+    print(f"✓ Cache stats: {stats['entries']} entries, {stats['negative_entries']} negative, "
+          f"{stats['expired_entries']} expired, by-date {by_date}")
+    return (stats["entries"] == 3 and stats["negative_entries"] == 1 and stats["expired_entries"] == 2
+            and by_date == {"hits": 4, "misses": 2})
+
+
+def _rejected(breaker: CircuitBreaker) -> bool:
+    try:
+        breaker.before_request()
+    except LottoAPIUnavailableError:
+        return True
+    return False
+
+
+def _open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker()
+    for _ in range(BREAKER_MIN_REQUESTS):
+        breaker.record(breaker.before_request(), True, "status 503")
+    return breaker
+
+
+def test_breaker_opens():
+    """Closed until BREAKER_MIN_REQUESTS outcomes reach the failure rate"""
+    breaker = CircuitBreaker()
+    for _ in range(BREAKER_MIN_REQUESTS - 1):
+        breaker.record(breaker.before_request(), True, "status 503")
+    below_minimum = breaker.state == "closed"
+    breaker.record(breaker.before_request(), True, "status 503")
+    snapshot = breaker.snapshot()
+    print(f"✓ Breaker opens: {snapshot}")
+    return below_minimum and snapshot["state"] == "open" and snapshot["times_opened"] == 1 and _rejected(breaker)
+
+
+def test_breaker_half_open():
+    """One trial after the cooldown: failure re-opens, success closes"""
+    breaker = _open_breaker()
+    clock.advance(BREAKER_COOLDOWN - 1)
+    still_open = _rejected(breaker)
+    clock.advance(1)
+    trial = breaker.before_request()
+    single_trial = breaker.state == "half_open" and _rejected(breaker)
+    breaker.record(trial, True, "status 503")
+    reopened = breaker.state == "open" and breaker.times_opened == 2 and _rejected(breaker)
+
+    clock.advance(BREAKER_COOLDOWN)
+    breaker.record(breaker.before_request(), False)
+    closed = breaker.state == "closed" and not breaker.outcomes and not _rejected(breaker)
+    print(f"✓ Breaker half-open: still open {still_open}, single trial {single_trial}, "
+          f"re-opened {reopened}, closed {closed}")
+    return still_open and single_trial and reopened and closed
+
+
+def test_breaker_stale_outcomes():
+    """Requests admitted before the breaker opened do not act as the trial"""
+    breaker = CircuitBreaker()
+    stale = breaker.before_request()
+    for _ in range(BREAKER_MIN_REQUESTS):
+        breaker.record(breaker.before_request(), True, "status 503")
+    clock.advance(BREAKER_COOLDOWN)
+    trial = breaker.before_request()
+
+    breaker.record(stale, False)
+    breaker.release(stale)
+    trial_pending = breaker.state == "half_open" and breaker.trial_in_flight
+    breaker.release(trial)  # cancelled trial - another may start
+    retrial = breaker.before_request()
+    breaker.record(retrial, False)
+    breaker.record(stale, True, "ReadTimeout")
+    closed = breaker.state == "closed" and not breaker.outcomes
+    print(f"✓ Breaker stale outcomes: trial still pending {trial_pending}, closed by retrial {closed}")
+    return trial_pending and closed
+
+
+def test_breaker_fast_fail():
+    """_get stops calling the API once the breaker opens"""
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(503)
+
+    async def run() -> list:
+        outcomes = []
+        async with httpx.AsyncClient(base_url=lotto_api.LOTTO_API_BASE_URL,
+                                     transport=httpx.MockTransport(handler)) as client:
+            for _ in range(BREAKER_MIN_REQUESTS + 3):
+                try:
+                    outcomes.append((await lotto_api._get(client, "/lotteries/draw-results/by-date-per-game")).status_code)
+                except LottoAPIUnavailableError:
+                    outcomes.append("unavailable")
+        return outcomes
+
+    breaker = lotto_api.breaker
+    lotto_api.breaker = CircuitBreaker()
+    try:
+        outcomes = asyncio.run(run())
+    finally:
+        lotto_api.breaker = breaker
+    print(f"✓ Breaker fast-fail: {len(calls)} API call(s), outcomes {outcomes}")
+    return len(calls) == BREAKER_MIN_REQUESTS and outcomes[-3:] == ["unavailable"] * 3
+
+
+def main():
+    print("=" * 50)
+    print("Testing Lotto.pl client internals")
+    print("=" * 50)
+    print()
+
+    tests = [
+        ("Cache TTL Rules", test_draw_date_ttl),
+        ("Cache Expiry", test_cache_expiry),
+        ("Cache Stats", test_cache_stats),
+        ("Breaker Opens", test_breaker_opens),
+        ("Breaker Half-Open", test_breaker_half_open),
+        ("Breaker Stale Outcomes", test_breaker_stale_outcomes),
+        ("Breaker Fast-Fail", test_breaker_fast_fail),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for name, test_func in tests:
+        print(f"\nTesting: {name}")
+        try:
+            if test_func():
+                print(f"✅ {name} PASSED")
+                passed += 1
+            else:
+                print(f"❌ {name} FAILED")
+                failed += 1
+        except Exception as e:
+            print(f"❌ {name} FAILED with error: {e}")
+            failed += 1
+
+    print()
+    print("=" * 50)
+    print(f"Results: {passed} passed, {failed} failed")
+    print("=" * 50)
+
+    if failed == 0:
+        print("🎉 All tests passed!")
+    else:
+        print("⚠️ Some tests failed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Rolling frequency series for charts (GetLos_T)
+Computed from the cumulative counts of the history snapshot and
+downsampled on the server with bucket averages
+"""
+from typing import List, Optional
+
+import numpy as np
+
+
+def rolling_counts(cum_counts: np.ndarray, start: int, end: int, window: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Per-number counts in the last `window` draws, for every draw in [start, end)
+    (may look back before start). Returns (positions, (M, 49) counts)
+    where positions are the draws that end each rolling window
+    """
+    first = max(start, window - 1)
+    if first >= end:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 49), dtype=np.int64)
+    positions = np.arange(first, end)
+    counts = cum_counts[positions + 1] - cum_counts[positions + 1 - window]
+    return positions, counts
+
+
+def bucket_average(positions: np.ndarray, values: np.ndarray, points: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Downsample to at most `points` buckets of (nearly) equal size
+    Returns (last position of every bucket, (points, 49) mean values)
+    """
+    if len(positions) <= points:
+        return positions, values.astype(np.float64)
+    bounds = np.linspace(0, len(positions), points + 1).astype(np.int64)
+    starts = bounds[:-1]
+    sizes = np.diff(bounds)
+    sums = np.add.reduceat(values, starts, axis=0)
+    return positions[bounds[1:] - 1], sums / sizes[:, None]
+
+
+def frequency_trends(
+    history,
+    start: int,
+    end: int,
+    window: int,
+    points: int,
+    numbers: Optional[List[int]] = None
+) -> dict:
+    """Rolling-window frequency series (draws containing the number per window)"""
+    positions, counts = rolling_counts(history.cum_counts, start, end, window)
+    positions, values = bucket_average(positions, counts, points)
+    numbers = numbers or list(range(1, 50))
+    series = values[:, np.asarray(numbers) - 1].T
+    return {
+        "window": window,
+        "points": len(positions),
+        "dates": [history.sources[p] for p in positions],
+        "sequential_ids": [history.sequential_ids[p] for p in positions],
+        "numbers": numbers,
+        "series": np.round(series, 2).tolist(),
+    }
@@ -0,0 +1,53 @@
+"""
+Per-data-version result cache for GetLos_T
+Results derived from a history snapshot are keyed by (data version, window);
+storing a result of a newer version drops all older ones
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+
+class VersionedLRU:
+    """Thread-safe LRU of results keyed by (version, *window)"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version: int, window: tuple) -> Optional[Any]:
+        """Cached result or None"""
+        key = (version,) + tuple(window)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, version: int, window: tuple, value: Any):
+        with self._lock:
+            self._store((version,) + tuple(window), value)
+
+    def get_or_create(self, version: int, window: tuple, factory: Callable[[], Any]) -> Any:
+        """
+        Cached result, or factory() stored under the key - built under the
+        lock, so concurrent callers share one instance
+        """
+        key = (version,) + tuple(window)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                value = factory()
+                self._store(key, value)
+            else:
+                self._entries.move_to_end(key)
+            return value
+
+    def _store(self, key: tuple, value: Any):
+        for k in [k for k in self._entries if k[0] != key[0]]:
+            del self._entries[k]
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)